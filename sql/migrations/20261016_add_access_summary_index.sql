@@ -0,0 +1,39 @@
+-- Idempotent: extend idx_event_time_user to cover the dashboard summary window scan
+SET @db_name = DATABASE();
+
+SET @idx_cols = (
+  SELECT COUNT(1)
+  FROM information_schema.statistics
+  WHERE table_schema = @db_name
+    AND table_name = 'audit_access_events'
+    AND index_name = 'idx_event_time_user'
+);
+SET @sql = IF(
+  @idx_cols = 0,
+  'ALTER TABLE audit_access_events ADD INDEX idx_event_time_user (event_time, user_email, dest_host, is_domain)',
+  IF(
+    @idx_cols < 4,
+    'ALTER TABLE audit_access_events DROP INDEX idx_event_time_user, ADD INDEX idx_event_time_user (event_time, user_email, dest_host, is_domain)',
+    'SELECT ''skip idx_event_time_user'''
+  )
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Earlier revisions of this migration added the wider index alongside the old one
+SET @idx_exists = (
+  SELECT COUNT(1)
+  FROM information_schema.statistics
+  WHERE table_schema = @db_name
+    AND table_name = 'audit_access_events'
+    AND index_name = 'idx_event_time_user_host_domain'
+);
+SET @sql = IF(
+  @idx_exists > 0,
+  'ALTER TABLE audit_access_events DROP INDEX idx_event_time_user_host_domain',
+  'SELECT ''skip drop idx_event_time_user_host_domain'''
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
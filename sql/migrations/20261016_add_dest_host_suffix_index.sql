@@ -0,0 +1,34 @@
+-- Idempotent reversed dest_host column + index for suffix searches (dest_host_match=suffix)
+SET @db_name = DATABASE();
+
+SET @col_exists = (
+  SELECT COUNT(1)
+  FROM information_schema.columns
+  WHERE table_schema = @db_name
+    AND table_name = 'audit_access_events'
+    AND column_name = 'dest_host_rev'
+);
+SET @sql = IF(
+  @col_exists = 0,
+  'ALTER TABLE audit_access_events ADD COLUMN dest_host_rev VARCHAR(191) AS (REVERSE(dest_host)) VIRTUAL AFTER confidence',
+  'SELECT ''skip dest_host_rev'''
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+SET @idx_exists = (
+  SELECT COUNT(1)
+  FROM information_schema.statistics
+  WHERE table_schema = @db_name
+    AND table_name = 'audit_access_events'
+    AND index_name = 'idx_dest_host_rev_time'
+);
+SET @sql = IF(
+  @idx_exists = 0,
+  'ALTER TABLE audit_access_events ADD INDEX idx_dest_host_rev_time (dest_host_rev, event_time)',
+  'SELECT ''skip idx_dest_host_rev_time'''
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -0,0 +1,21 @@
+-- Per-minute error counters read by the error summary dashboard instead of scanning audit_error_events.
+CREATE TABLE IF NOT EXISTS audit_error_minute_stats (
+  minute_ts DATETIME NOT NULL,
+  level VARCHAR(16) NOT NULL,
+  category VARCHAR(64) NOT NULL,
+  is_noise TINYINT(1) NOT NULL,
+  hits BIGINT UNSIGNED NOT NULL,
+  PRIMARY KEY (minute_ts, level, category, is_noise)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- Backfill from stored events. Counts are overwritten, not added, so re-running is safe.
+INSERT INTO audit_error_minute_stats(minute_ts, level, category, is_noise, hits)
+SELECT
+  DATE_FORMAT(event_time, '%Y-%m-%d %H:%i:00') AS minute_ts,
+  level,
+  category,
+  is_noise,
+  COUNT(*) AS hits
+FROM audit_error_events
+GROUP BY minute_ts, level, category, is_noise
+ON DUPLICATE KEY UPDATE hits=VALUES(hits);
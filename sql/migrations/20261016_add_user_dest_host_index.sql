@@ -0,0 +1,39 @@
+-- Idempotent: extend idx_user_time to cover per-user unique destination counts in the users list
+SET @db_name = DATABASE();
+
+SET @idx_cols = (
+  SELECT COUNT(1)
+  FROM information_schema.statistics
+  WHERE table_schema = @db_name
+    AND table_name = 'audit_access_events'
+    AND index_name = 'idx_user_time'
+);
+SET @sql = IF(
+  @idx_cols = 0,
+  'ALTER TABLE audit_access_events ADD INDEX idx_user_time (user_email, event_time, dest_host)',
+  IF(
+    @idx_cols < 3,
+    'ALTER TABLE audit_access_events DROP INDEX idx_user_time, ADD INDEX idx_user_time (user_email, event_time, dest_host)',
+    'SELECT ''skip idx_user_time'''
+  )
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
+
+-- Earlier revisions of this migration added the wider index alongside the old one
+SET @idx_exists = (
+  SELECT COUNT(1)
+  FROM information_schema.statistics
+  WHERE table_schema = @db_name
+    AND table_name = 'audit_access_events'
+    AND index_name = 'idx_user_time_dest_host'
+);
+SET @sql = IF(
+  @idx_exists > 0,
+  'ALTER TABLE audit_access_events DROP INDEX idx_user_time_dest_host',
+  'SELECT ''skip drop idx_user_time_dest_host'''
+);
+PREPARE stmt FROM @sql;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;
@@ -26,15 +26,17 @@ CREATE TABLE IF NOT EXISTS audit_access_events (
   reason TEXT NOT NULL,
   is_domain TINYINT(1) NOT NULL,
   confidence VARCHAR(16) NOT NULL,
+  dest_host_rev VARCHAR(191) AS (REVERSE(dest_host)) VIRTUAL,
   PRIMARY KEY (id),
   UNIQUE KEY uniq_access_raw_event (raw_event_id),
-  KEY idx_user_time (user_email, event_time),
+  KEY idx_user_time (user_email, event_time, dest_host),
   KEY idx_dest_host_time (dest_host, event_time),
   KEY idx_event_time (event_time),
-  KEY idx_event_time_user (event_time, user_email),
+  KEY idx_event_time_user (event_time, user_email, dest_host, is_domain),
   KEY idx_event_time_dest_host (event_time, dest_host),
   KEY idx_event_time_detour (event_time, detour),
   KEY idx_event_time_status (event_time, status),
+  KEY idx_dest_host_rev_time (dest_host_rev, event_time),
   CONSTRAINT fk_access_raw_event FOREIGN KEY (raw_event_id)
     REFERENCES audit_raw_events(id)
     ON DELETE CASCADE
@@ -112,6 +114,15 @@ CREATE TABLE IF NOT EXISTS audit_error_events (
   FULLTEXT KEY ft_err_lookup (component, message, src, dest_raw)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+CREATE TABLE IF NOT EXISTS audit_error_minute_stats (
+  minute_ts DATETIME NOT NULL,
+  level VARCHAR(16) NOT NULL,
+  category VARCHAR(64) NOT NULL,
+  is_noise TINYINT(1) NOT NULL,
+  hits BIGINT UNSIGNED NOT NULL,
+  PRIMARY KEY (minute_ts, level, category, is_noise)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
 CREATE TABLE IF NOT EXISTS audit_job_state (
   state_key VARCHAR(128) NOT NULL,
   value_text TEXT NOT NULL,
@@ -21,12 +21,17 @@ class _StubRedisCache:
 
 
 class _StubQueryService:
+    auth_events_dropped = 0
+
     def collector_state(self, file_path: str):
         return None
 
     def recent_events(self, seconds: int, limit: int):
         return []
 
+    def flush_auth_events(self):
+        return None
+
     def query_events(
         self,
         dt_from,
@@ -38,6 +43,8 @@ class _StubQueryService:
         is_domain,
         page,
         page_size,
+        dest_host_match="contains",
+        after=None,
     ):
         return 1, [
             {
@@ -49,7 +56,7 @@ class _StubQueryService:
             }
         ]
 
-    def user_visits_paged(self, email, dt_from, dt_to, page, page_size):
+    def user_visits_paged(self, email, dt_from, dt_to, page, page_size, after=None):
         return 1, [{"event_time": "2026-02-18T00:00:00", "user_email": email}]
 
     def list_users(self, dt_from, dt_to, page, page_size):
@@ -74,8 +81,13 @@ class _StubQueryService:
         keyword,
         page,
         page_size,
+        after=None,
+        keyword_fallback=False,
     ):
-        return 1, [{"event_time": "2026-02-18T00:00:00", "level": "warning", "category": "runtime_warning"}]
+        return [{"id": 1, "event_time": "2026-02-18T00:00:00", "level": "warning", "category": "runtime_warning"}], False
+
+    def count_error_events(self, dt_from, dt_to, level, category, include_noise, keyword, keyword_fallback=False):
+        return 1
 
     def error_summary_stats(self, window_seconds: int):
         return {
@@ -151,6 +163,33 @@ def test_events_query_success() -> None:
     assert len(body["items"]) == 1
 
 
+def test_events_query_bad_dest_host_match_returns_400() -> None:
+    client = _client()
+    resp = client.get(
+        "/api/v1/events/query",
+        params={
+            "from": "2026-02-18T00:00:00",
+            "to": "2026-02-18T01:00:00",
+            "dest_host": "example.com",
+            "dest_host_match": "regex",
+        },
+    )
+    assert resp.status_code == 400
+
+
+def test_events_query_after_cursor_requires_both_parts() -> None:
+    client = _client()
+    resp = client.get(
+        "/api/v1/events/query",
+        params={
+            "from": "2026-02-18T00:00:00",
+            "to": "2026-02-18T01:00:00",
+            "after_time": "2026-02-18T00:30:00",
+        },
+    )
+    assert resp.status_code == 400
+
+
 def test_users_list_page_out_of_range_returns_400() -> None:
     client = _client()
     resp = client.get(
@@ -193,6 +232,42 @@ def test_query_errors_success() -> None:
     assert resp.json()["total"] == 1
 
 
+def test_query_errors_invalid_cursor_returns_400() -> None:
+    client = _client()
+    resp = client.get(
+        "/api/v1/errors/query",
+        params={
+            "from": "2026-02-18T00:00:00",
+            "to": "2026-02-18T01:00:00",
+            "after": "not-a-cursor",
+        },
+    )
+    assert resp.status_code == 400
+
+
+class _MorePagesQueryService(_StubQueryService):
+    def query_error_events(self, *args, **kwargs):
+        rows, _ = super().query_error_events(*args, **kwargs)
+        return rows, True
+
+
+def test_query_errors_cursor_is_bound_to_filters() -> None:
+    client = _client()
+    api_module.query_service = _MorePagesQueryService()
+    params = {"from": "2026-02-18T00:00:00", "to": "2026-02-18T01:00:00"}
+
+    resp = client.get("/api/v1/errors/query", params=params)
+    assert resp.status_code == 200
+    token = resp.json()["next_after"]
+    assert token
+
+    resp = client.get("/api/v1/errors/query", params={**params, "after": token})
+    assert resp.status_code == 200
+
+    resp = client.get("/api/v1/errors/query", params={**params, "after": token, "level": "error"})
+    assert resp.status_code == 400
+
+
 def test_error_summary_success() -> None:
     client = _client()
     resp = client.get("/api/v1/errors/summary", params={"window": "1h"})
@@ -217,3 +292,4 @@ def test_metrics_endpoint_text() -> None:
     text = resp.text
     assert "xray_audit_api_requests_total" in text
     assert "xray_audit_api_responses_5xx_total" in text
+    assert "xray_audit_auth_events_dropped_total 0" in text
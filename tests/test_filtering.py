@@ -20,10 +20,14 @@ def _settings(**kwargs):
         mysql_password="p",
         mysql_db="d",
         mysql_charset="utf8mb4",
+        mysql_pool_size=10,
+        mysql_ingest_workers=1,
         redis_url="redis://127.0.0.1:6379/0",
         redis_enabled=False,
+        redis_pool_size=16,
         api_host="127.0.0.1",
         api_port=8088,
+        api_workers=1,
         collector_embedded=False,
         drop_api_to_api=True,
         drop_loopback_traffic=True,
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+import pytest
+import redis
+import redis.connection
+
+import xray_audit.redis_cache as redis_cache_module
+from xray_audit.config import Settings
+from xray_audit.models import AccessEvent, ParsedEvent
+from xray_audit.redis_cache import RedisCache
+
+
+class _FakePipeline:
+    def __init__(self, redis: "_FakeRedis") -> None:
+        self.redis = redis
+        self.commands: List[Tuple[Any, ...]] = []
+
+    def __enter__(self) -> "_FakePipeline":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __getattr__(self, name: str):
+        def command(*args: Any, **kwargs: Any) -> None:
+            self.commands.append((name,) + args)
+
+        return command
+
+    def execute(self) -> List[Any]:
+        self.redis.entered.set()
+        if self.redis.gate is not None:
+            self.redis.gate.wait(5)
+        if self.redis.fail_next:
+            self.redis.fail_next -= 1
+            raise ConnectionError("redis down")
+        self.redis.executed.append(self.commands)
+        return []
+
+
+class _FakeRedis:
+    def __init__(self) -> None:
+        self.executed: List[List[Tuple[Any, ...]]] = []
+        self.fail_next = 0
+        self.gate: Optional[threading.Event] = None
+        self.entered = threading.Event()
+
+    def pipeline(self, transaction: bool = True) -> _FakePipeline:
+        return _FakePipeline(self)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def _cache(redis: _FakeRedis) -> RedisCache:
+    cache = RedisCache(replace(Settings.from_env(), redis_enabled=False, node_id="n1"))
+    cache.client = redis
+    return cache
+
+
+def _batch(user: str = "u@example.com") -> List[ParsedEvent]:
+    t = datetime(2026, 1, 1, 12, 0, 0)
+    access = AccessEvent(
+        event_time=t,
+        user_email=user,
+        src="1.2.3.4:5000",
+        dest_raw="tcp:example.com:443",
+        dest_host="example.com",
+        dest_port=443,
+        status="accepted",
+        detour="direct",
+        reason="",
+        is_domain=True,
+        confidence="high",
+    )
+    return [ParsedEvent(event_time=t, event_type="access", raw_line="line", raw_hash="h", access=access)]
+
+
+def _offline_pool(monkeypatch, pool_size: int) -> redis.ConnectionPool:
+    # Connections are handed out without opening a socket.
+    monkeypatch.setattr(redis.connection.Connection, "connect", lambda self: None)
+    monkeypatch.setattr(redis.connection.Connection, "can_read", lambda self, timeout=0: False)
+    settings = replace(Settings.from_env(), redis_url="redis://127.0.0.1:6379/0", redis_pool_size=pool_size)
+    return redis_cache_module._build_pool(settings, decode_responses=True)
+
+
+def _names(commands: List[Tuple[Any, ...]]) -> List[str]:
+    return [command[0] for command in commands]
+
+
+def test_writer_thread_writes_queued_batches() -> None:
+    redis = _FakeRedis()
+    cache = _cache(redis)
+
+    cache.update_from_events(_batch())
+    cache._writer_queue.join()
+
+    assert len(redis.executed) == 1
+    assert {"zincrby", "zadd", "lpush"} <= set(_names(redis.executed[0]))
+    assert cache.dropped_batches == 0
+
+
+def test_writer_counts_failed_writes_and_keeps_running() -> None:
+    redis = _FakeRedis()
+    redis.fail_next = 1
+    cache = _cache(redis)
+
+    cache.update_from_events(_batch("a@example.com"))
+    cache.update_from_events(_batch("b@example.com"))
+    cache._writer_queue.join()
+
+    assert cache.stats() == {"dropped_batches": 1, "last_write_error": "redis down"}
+    assert len(redis.executed) == 1
+
+
+def test_full_writer_queue_counts_dropped_batches() -> None:
+    redis = _FakeRedis()
+    redis.gate = threading.Event()
+    cache = _cache(redis)
+
+    # The first batch parks the writer inside execute(); the rest fill the queue.
+    cache.update_from_events(_batch())
+    assert redis.entered.wait(5)
+    for _ in range(cache._writer_queue.maxsize + 2):
+        cache.update_from_events(_batch())
+    assert cache.dropped_batches == 2
+
+    redis.gate.set()
+    cache._writer_queue.join()
+    assert len(redis.executed) == 1 + cache._writer_queue.maxsize
+
+
+def test_maintenance_runs_at_most_once_per_interval(monkeypatch) -> None:
+    clock = _Clock()
+    monkeypatch.setattr(redis_cache_module, "time", clock)
+    redis = _FakeRedis()
+    cache = _cache(redis)
+
+    cache._write_events(_batch())
+    clock.now += redis_cache_module._MAINTENANCE_INTERVAL_SECONDS / 2
+    cache._write_events(_batch())
+    clock.now += redis_cache_module._MAINTENANCE_INTERVAL_SECONDS / 2 + 0.1
+    cache._write_events(_batch())
+
+    trims = ["ltrim" in _names(commands) for commands in redis.executed]
+    assert trims == [True, False, True]
+    assert ["zremrangebyscore" in _names(commands) for commands in redis.executed] == trims
+
+
+def test_exhausted_pool_waits_for_a_released_connection(monkeypatch) -> None:
+    pool = _offline_pool(monkeypatch, pool_size=1)
+    first = pool.get_connection()
+
+    threading.Timer(0.1, pool.release, args=(first,)).start()
+    started = time.monotonic()
+    assert pool.get_connection() is first
+    assert time.monotonic() - started >= 0.05
+
+
+def test_exhausted_pool_gives_up_after_the_wait_timeout(monkeypatch) -> None:
+    monkeypatch.setattr(redis_cache_module, "_POOL_WAIT_TIMEOUT_SECONDS", 0.05)
+    pool = _offline_pool(monkeypatch, pool_size=2)
+    pool.get_connection()
+    pool.get_connection()
+
+    with pytest.raises(redis.ConnectionError):
+        pool.get_connection()
+
+
+def test_concurrent_drops_are_all_counted() -> None:
+    cache = _cache(_FakeRedis())
+    threads = [threading.Thread(target=lambda: [cache._record_drop("x") for _ in range(10000)]) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.stats()["dropped_batches"] == 40000
@@ -0,0 +1,478 @@
+from __future__ import annotations
+
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+import xray_audit.storage as storage_module
+from xray_audit.config import Settings
+from xray_audit.models import AccessEvent, ParsedErrorEvent, ParsedEvent
+from xray_audit.storage import AuditQueryService, MySQLIngestor, _insert_multirow, _TTLCache
+
+
+class _FakeDB:
+    """In-memory stand-in for the statements the storage tests drive; unknown SQL fails the test.
+
+    A SELECT containing the text of an `answers` entry gets that entry's rows; other page queries
+    get page_rows, and every COUNT the next of 1001, 1002, ...
+    """
+
+    def __init__(
+        self,
+        autoinc_lock_mode: int = 1,
+        id_step: int = 1,
+        gap_between_statements: int = 0,
+        page_rows: Tuple[Dict[str, Any], ...] = (),
+        tables: Tuple[str, ...] = (),
+        answers: Tuple[Tuple[str, List[Any]], ...] = (),
+    ) -> None:
+        self.autoinc_lock_mode = autoinc_lock_mode
+        # id_step > 1 stands in for concurrent inserts interleaving ids inside one statement.
+        self.id_step = id_step
+        self.gap_between_statements = gap_between_statements
+        self.page_rows = list(page_rows)
+        self.tables = set(tables)
+        self.answers = answers
+        self.next_id = 1
+        self.raw: Dict[Tuple[str, str], int] = {}
+        self.children: Dict[str, List[Tuple[Any, ...]]] = defaultdict(list)
+        self.config: Dict[str, str] = {}
+        self.history: List[Tuple[Any, ...]] = []
+        self.count_params: List[Tuple[Any, ...]] = []
+        self.statements: List[str] = []
+        self.commits = 0
+
+
+class _FakeCursor:
+    def __init__(self, db: _FakeDB) -> None:
+        self.db = db
+        self.lastrowid: Optional[int] = None
+        self._rows: List[Any] = []
+
+    def __enter__(self) -> "_FakeCursor":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def execute(self, sql: str, params: Any = None) -> None:
+        db = self.db
+        sql = " ".join(sql.split())
+        db.statements.append(sql)
+        if "@@innodb_autoinc_lock_mode" in sql:
+            self._rows = [(db.autoinc_lock_mode, 1)]
+        elif sql.startswith("SELECT id, raw_hash FROM audit_raw_events"):
+            node_id, hashes = params[0], set(params[1:])
+            self._rows = [(raw_id, h) for (n, h), raw_id in db.raw.items() if n == node_id and h in hashes]
+        elif sql.startswith("INSERT INTO audit_raw_events("):
+            self._insert_raw(sql, params)
+        elif "COUNT(*) AS total" in sql:
+            db.count_params.append(tuple(params))
+            self._rows = [{"total": 1000 + len(db.count_params)}]
+        elif sql.startswith("SELECT config_key, value_json FROM audit_runtime_config "):
+            self._rows = [(key, db.config[key]) for key in params if key in db.config]
+        elif sql.startswith("INSERT INTO audit_runtime_config_history("):
+            db.history.extend(tuple(params[i : i + 5]) for i in range(0, len(params), 5))
+        elif sql.startswith("INSERT INTO audit_runtime_config("):
+            for i in range(0, len(params), 5):
+                # MySQL hands JSON columns back re-serialized, with a space after ':' and ','.
+                db.config[params[i]] = params[i + 1].replace(":", ": ").replace(",", ", ")
+        elif "FROM information_schema.TABLES" in sql:
+            self._rows = [(1,)] if params[0] in db.tables else []
+        elif sql.startswith("SELECT"):
+            answer = next((rows for text, rows in db.answers if text in sql), db.page_rows)
+            self._rows = list(answer)
+        elif sql.startswith("INSERT INTO "):
+            db.children[sql.split("INSERT INTO ", 1)[1].split("(", 1)[0]].append(tuple(params))
+        else:
+            raise AssertionError(f"unexpected SQL: {sql}")
+
+    def _insert_raw(self, sql: str, params: List[Any]) -> None:
+        db = self.db
+        self.lastrowid = None
+        for start in range(0, len(params), 5):
+            _, _, _, raw_hash, node_id = params[start : start + 5]
+            if (node_id, raw_hash) in db.raw:
+                assert "ON DUPLICATE KEY UPDATE" in sql
+                continue
+            db.raw[(node_id, raw_hash)] = db.next_id
+            if self.lastrowid is None:
+                self.lastrowid = db.next_id
+            db.next_id += db.id_step
+        db.next_id += db.gap_between_statements
+
+    def executemany(self, sql: str, rows: List[Tuple[Any, ...]]) -> None:
+        sql = " ".join(sql.split())
+        self.db.statements.append(sql)
+        table = sql.split("INSERT INTO ", 1)[1].split("(", 1)[0].strip()
+        self.db.children[table].extend(rows)
+
+    def fetchone(self) -> Any:
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self) -> List[Any]:
+        return list(self._rows)
+
+
+class _FakeConn:
+    def __init__(self, db: _FakeDB) -> None:
+        self.db = db
+
+    def cursor(self, cursorclass: Any = None) -> _FakeCursor:
+        return _FakeCursor(self.db)
+
+    def commit(self) -> None:
+        self.db.commits += 1
+
+
+class _FakeFactory:
+    def __init__(self, db: _FakeDB) -> None:
+        self.db = db
+
+    @contextmanager
+    def pooled(self):
+        yield _FakeConn(self.db)
+
+
+class _RecordingCursor:
+    def __init__(self) -> None:
+        self.calls: List[Tuple[str, List[Any]]] = []
+        self.lastrowid = 0
+
+    def execute(self, sql: str, params: List[Any]) -> None:
+        self.calls.append((sql, params))
+        self.lastrowid = 100 * len(self.calls)
+
+
+_Storage = TypeVar("_Storage", MySQLIngestor, AuditQueryService)
+
+
+def _on_fake_db(cls: Type[_Storage], db: _FakeDB) -> _Storage:
+    storage = cls(Settings.from_env())
+    storage.factory = _FakeFactory(db)
+    return storage
+
+
+def _query_events(service: AuditQueryService, page: int = 1, page_size: int = 2, **filters: Any):
+    args: Dict[str, Any] = dict(email=None, dest_host=None, status=None, detour=None, is_domain=None)
+    args.update(filters)
+    return service.query_events(datetime(2026, 1, 1), datetime(2026, 1, 2), page=page, page_size=page_size, **args)
+
+
+def _events(count: int, prefix: str = "line") -> List[ParsedEvent]:
+    base = datetime(2026, 1, 1)
+    out = []
+    for i in range(count):
+        t = base + timedelta(seconds=i)
+        access = AccessEvent(
+            event_time=t,
+            user_email=f"u{i}@example.com",
+            src="1.2.3.4:5000",
+            dest_raw=f"tcp:host{i}.example:443",
+            dest_host=f"host{i}.example",
+            dest_port=443,
+            status="accepted",
+            detour="direct",
+            reason="",
+            is_domain=True,
+            confidence="high",
+        )
+        raw_line = f"{prefix} {i}"
+        out.append(
+            ParsedEvent(
+                event_time=t,
+                event_type="access",
+                raw_line=raw_line,
+                raw_hash=MySQLIngestor._hash(raw_line),
+                access=access,
+            )
+        )
+    return out
+
+
+def _error_events(count: int, prefix: str = "err") -> List[ParsedErrorEvent]:
+    base = datetime(2026, 1, 1, 12, 0, 0)
+    return [
+        ParsedErrorEvent(
+            event_time=base + timedelta(seconds=i),
+            level="warning",
+            session_id=i,
+            component="proxy",
+            message="dial failed",
+            src="1.2.3.4:5000",
+            dest_raw="tcp:example.com:443",
+            dest_host="example.com",
+            dest_port=443,
+            category="dial_timeout",
+            signature_hash="sig",
+            is_noise=False,
+            raw_line=f"{prefix} {i}",
+            raw_hash="",
+        )
+        for i in range(count)
+    ]
+
+
+def _assert_children_point_at_their_raw_rows(db: _FakeDB, events: List[ParsedEvent], node_id: str) -> None:
+    by_user = {ev.access.user_email: db.raw[(node_id, ev.raw_hash)] for ev in events}
+    assert len(db.children["audit_access_events"]) == len(by_user)
+    for row in db.children["audit_access_events"]:
+        assert row[0] == by_user[row[2]]
+
+
+def test_contiguous_ids_are_mapped_per_chunk() -> None:
+    # Three chunks, with other writers taking ids between statements.
+    db = _FakeDB(autoinc_lock_mode=1, gap_between_statements=1000)
+    events = _events(2 * storage_module._MULTIROW_CHUNK + 3)
+
+    counts = _on_fake_db(MySQLIngestor, db)._ingest_shard(events, "n1")
+
+    assert counts == {"raw": len(events), "access": len(events), "dns": 0}
+    _assert_children_point_at_their_raw_rows(db, events, "n1")
+    # Ids came from lastrowid arithmetic; nothing selected them back after the INSERTs.
+    first_insert = next(i for i, s in enumerate(db.statements) if "INSERT INTO audit_raw_events" in s)
+    assert not any(s.startswith("SELECT id, raw_hash") for s in db.statements[first_insert:])
+    assert sum("INSERT INTO audit_raw_events" in s for s in db.statements) == 3
+
+
+def test_non_contiguous_ids_are_selected_back() -> None:
+    db = _FakeDB(autoinc_lock_mode=2, id_step=7)
+    events = _events(5)
+
+    counts = _on_fake_db(MySQLIngestor, db)._ingest_shard(events, "n1")
+
+    assert counts == {"raw": 5, "access": 5, "dns": 0}
+    _assert_children_point_at_their_raw_rows(db, events, "n1")
+    raw_inserts = [s for s in db.statements if "INSERT INTO audit_raw_events" in s]
+    assert len(raw_inserts) == 1 and "ON DUPLICATE KEY UPDATE id=id" in raw_inserts[0]
+    assert sum(s.startswith("SELECT id, raw_hash") for s in db.statements) == 2
+
+
+def test_autoinc_probe_runs_once() -> None:
+    db = _FakeDB(autoinc_lock_mode=2)
+    ingestor = _on_fake_db(MySQLIngestor, db)
+    ingestor._ingest_shard(_events(2, "a"), "n1")
+    ingestor._ingest_shard(_events(2, "b"), "n1")
+    assert sum("@@innodb_autoinc_lock_mode" in s for s in db.statements) == 1
+
+
+def test_duplicate_hashes_are_skipped() -> None:
+    db = _FakeDB()
+    ingestor = _on_fake_db(MySQLIngestor, db)
+    first = _events(3)
+    ingestor._ingest_shard(first, "n1")
+    db.statements.clear()
+
+    # Two lines already stored, one repeated within the batch, one new.
+    replay = _events(2) + _events(4)[3:] * 2
+    counts = ingestor._ingest_shard(replay, "n1")
+
+    assert counts == {"raw": 1, "access": 1, "dns": 0}
+    assert len(db.raw) == 4
+    assert len(db.children["audit_access_events"]) == 4
+
+    db.statements.clear()
+    assert ingestor._ingest_shard(_events(4), "n1") == {"raw": 0, "access": 0, "dns": 0}
+    assert not any("INSERT" in s for s in db.statements)
+
+
+def test_same_line_on_another_node_is_not_a_duplicate() -> None:
+    db = _FakeDB()
+    ingestor = _on_fake_db(MySQLIngestor, db)
+    ingestor._ingest_shard(_events(2), "n1")
+    assert ingestor._ingest_shard(_events(2), "n2")["raw"] == 2
+    assert len(db.raw) == 4
+
+
+def test_insert_multirow_splits_rows_into_chunks() -> None:
+    cur = _RecordingCursor()
+    rows = [(i, f"v{i}") for i in range(7)]
+
+    first_ids = _insert_multirow(
+        cur, "INSERT INTO t(a, b) VALUES ", "(%s, %s)", rows, " ON DUPLICATE KEY UPDATE b=b", chunk_size=3
+    )
+
+    assert first_ids == [100, 200, 300]
+    assert [sql.count("(%s, %s)") for sql, _ in cur.calls] == [3, 3, 1]
+    assert all(sql.endswith(" ON DUPLICATE KEY UPDATE b=b") for sql, _ in cur.calls)
+    assert [value for _, params in cur.calls for value in params] == [value for row in rows for value in row]
+
+
+def test_insert_multirow_exact_multiple_and_empty() -> None:
+    cur = _RecordingCursor()
+    assert len(_insert_multirow(cur, "INSERT INTO t(a) VALUES ", "(%s)", [(i,) for i in range(6)], chunk_size=3)) == 2
+    assert [len(params) for _, params in cur.calls] == [3, 3]
+
+    cur = _RecordingCursor()
+    assert _insert_multirow(cur, "INSERT INTO t(a) VALUES ", "(%s)", []) == []
+    assert cur.calls == []
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+def test_ttl_cache_expires_entries(monkeypatch) -> None:
+    clock = _Clock()
+    monkeypatch.setattr(storage_module, "time", clock)
+    cache = _TTLCache(ttl_seconds=15.0)
+    cache.set("k", 42)
+
+    clock.now += 14.9
+    assert cache.get("k") == 42
+    clock.now += 0.1
+    assert cache.get("k") is None
+
+    cache.set("k", 1)
+    cache.discard("k")
+    assert cache.get("k") is None
+
+
+def test_ttl_cache_drops_expired_entries_before_live_ones_when_full(monkeypatch) -> None:
+    clock = _Clock()
+    monkeypatch.setattr(storage_module, "time", clock)
+    cache = _TTLCache(ttl_seconds=10.0, max_entries=2)
+    cache.set("old", 1)
+    clock.now += 5
+    cache.set("live", 2)
+    clock.now += 6
+    cache.set("new", 3)
+    assert (cache.get("old"), cache.get("live"), cache.get("new")) == (None, 2, 3)
+
+    # All live and full: the oldest insertion makes room.
+    cache.set("newest", 4)
+    assert (cache.get("live"), cache.get("new"), cache.get("newest")) == (None, 3, 4)
+
+
+def test_page_total_short_first_page_needs_no_count() -> None:
+    db = _FakeDB(page_rows=({"id": 1},))
+    total, rows = _query_events(_on_fake_db(AuditQueryService, db))
+    assert (total, len(rows)) == (1, 1)
+    assert db.count_params == []
+
+
+def test_page_total_reuses_count_for_the_same_filters() -> None:
+    db = _FakeDB(page_rows=({"id": 1}, {"id": 2}))
+    service = _on_fake_db(AuditQueryService, db)
+
+    assert _query_events(service, page=1, email="a@example.com")[0] == 1001
+    assert _query_events(service, page=2, email="a@example.com")[0] == 1001
+    assert len(db.count_params) == 1
+
+
+def test_page_total_is_not_shared_across_filter_combinations() -> None:
+    db = _FakeDB(page_rows=({"id": 1}, {"id": 2}))
+    service = _on_fake_db(AuditQueryService, db)
+
+    # Same bound values, but on different columns: the filter mask keeps the keys apart.
+    assert _query_events(service, email="x")[0] == 1001
+    assert _query_events(service, status="x")[0] == 1002
+    assert _query_events(service, email="x", is_domain=True)[0] == 1003
+    assert _query_events(service, email="x", is_domain=False)[0] == 1004
+    assert _query_events(service, dest_host="x")[0] == 1005
+    assert _query_events(service, dest_host="x", dest_host_match="suffix")[0] == 1006
+    assert len(db.count_params) == 6
+
+    assert _query_events(service, status="x")[0] == 1002
+    assert len(db.count_params) == 6
+
+
+def test_error_count_cache_key_covers_every_filter() -> None:
+    db = _FakeDB()
+    service = _on_fake_db(AuditQueryService, db)
+    t0, t1 = datetime(2026, 1, 1), datetime(2026, 1, 2)
+
+    totals = [
+        service.count_error_events(t0, t1, "x", None, True, None),
+        service.count_error_events(t0, t1, None, "x", True, None),
+        service.count_error_events(t0, t1, None, "x", False, None),
+        service.count_error_events(t0, t1 + timedelta(seconds=1), None, "x", False, None),
+    ]
+    assert totals == [1001, 1002, 1003, 1004]
+    assert service.count_error_events(t0, t1, None, "x", True, None) == 1002
+    assert len(db.count_params) == 4
+
+
+def test_runtime_config_upsert_skips_history_for_unchanged_values() -> None:
+    db = _FakeDB()
+    service = _on_fake_db(AuditQueryService, db)
+    service.runtime_config_upsert({"exclude_detours": ["api", "block"], "batch_size": 100}, "admin", "10.0.0.1")
+    assert len(db.history) == 2
+    commits = db.commits
+
+    service.runtime_config_upsert({"exclude_detours": ["api", "block"], "batch_size": 100}, "admin", "10.0.0.1")
+
+    assert len(db.history) == 2
+    assert db.commits == commits
+
+
+def test_runtime_config_upsert_records_one_history_row_per_changed_value() -> None:
+    db = _FakeDB()
+    service = _on_fake_db(AuditQueryService, db)
+    service.runtime_config_upsert({"exclude_detours": ["api"], "batch_size": 100}, "admin", "10.0.0.1")
+    db.history.clear()
+
+    service.runtime_config_upsert({"exclude_detours": ["api"], "batch_size": 200}, "ops", "10.0.0.2")
+
+    assert len(db.history) == 1
+    key, old_value, new_value, changed_by, source_ip = db.history[0]
+    assert (key, changed_by, source_ip) == ("batch_size", "ops", "10.0.0.2")
+    assert (old_value, new_value) == ("100", "200")
+
+
+def test_error_minute_counters_resume_once_the_table_exists(capsys) -> None:
+    db = _FakeDB()
+    ingestor = _on_fake_db(MySQLIngestor, db)
+
+    ingestor.ingest_error_events(_error_events(2, "a"), "n1")
+    ingestor.ingest_error_events(_error_events(2, "b"), "n1")
+    assert "audit_error_minute_stats" not in db.children
+    assert capsys.readouterr().out.count("audit_error_minute_stats is missing") == 1
+
+    # Migration applied while the collector keeps running.
+    db.tables.add("audit_error_minute_stats")
+    ingestor.ingest_error_events(_error_events(3, "c"), "n1")
+    minute = datetime(2026, 1, 1, 12, 0)
+    assert db.children["audit_error_minute_stats"] == [(minute, "warning", "dial_timeout", False, 3)]
+
+    probes = sum("information_schema.TABLES" in sql for sql in db.statements)
+    ingestor.ingest_error_events(_error_events(1, "d"), "n1")
+    assert sum("information_schema.TABLES" in sql for sql in db.statements) == probes
+
+
+def test_error_summary_payload_reads_totals_from_the_rollup() -> None:
+    signature = {"category": "dial_timeout", "signature_hash": "sig", "hits": 7}
+    db = _FakeDB(
+        answers=(
+            (
+                "WITH ROLLUP",
+                [
+                    ("error", "dial_timeout", 2),
+                    ("error", None, 2),
+                    ("warning", "dial_timeout", 5),
+                    ("warning", "dns", 3),
+                    ("warning", None, 8),
+                    (None, None, 10),
+                ],
+            ),
+            ("GROUP BY category, signature_hash", [signature]),
+        )
+    )
+    t0, t1 = datetime(2026, 1, 1), datetime(2026, 1, 2)
+
+    payload = _on_fake_db(AuditQueryService, db).error_summary_payload(t0, t1, max_items=2)
+
+    assert payload["total"] == 10
+    assert payload["level_category"] == [
+        {"level": "warning", "category": "dial_timeout", "hits": 5},
+        {"level": "warning", "category": "dns", "hits": 3},
+    ]
+    assert payload["top_signatures"] == [signature]
+    signature_sql = next(sql for sql in db.statements if "GROUP BY category, signature_hash" in sql)
+    assert "ORDER BY hits DESC LIMIT %s" in signature_sql
+    assert "message" not in signature_sql.split("FROM (", 1)[1]
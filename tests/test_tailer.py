@@ -17,3 +17,38 @@ def test_tailer_reads_and_handles_truncate(tmp_path: Path) -> None:
 
     p.write_text("b\n", encoding="utf-8")
     assert t.read_new_lines() == ["b\n"]
+
+
+def test_tailer_holds_back_partial_line(tmp_path: Path) -> None:
+    p = tmp_path / "access.log"
+    p.write_bytes(b"a\nb\nc")
+
+    t = LogTailer(str(p))
+    assert t.read_new_lines(max_lines=1) == ["a\n"]
+    assert t.state()[1] == 2
+    assert t.read_new_lines() == ["b\n"]
+    assert t.state()[1] == 4
+
+    with p.open("ab") as fh:
+        fh.write(b"c\n")
+    assert t.read_new_lines() == ["cc\n"]
+    assert t.state()[1] == 7
+
+
+def test_tailer_drains_rotated_file_before_following_new_one(tmp_path: Path) -> None:
+    p = tmp_path / "access.log"
+    p.write_bytes(b"a\n")
+
+    t = LogTailer(str(p))
+    assert t.read_new_lines() == ["a\n"]
+
+    # Simulate rename-based rotation with a late, unterminated write to the old file.
+    rotated = tmp_path / "access.log.1"
+    p.rename(rotated)
+    with rotated.open("ab") as fh:
+        fh.write(b"b")
+    p.write_bytes(b"c\n")
+
+    assert t.read_new_lines() == ["b"]
+    assert t.read_new_lines() == ["c\n"]
+    assert t.state() == (p.stat().st_ino, 2)
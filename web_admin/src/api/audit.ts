@@ -4,7 +4,7 @@ import type {
   ActiveUser,
   AuthMe,
   DomainHit,
-  ErrorEventRow,
+  ErrorsQueryResponse,
   ErrorSummary,
   GeoIPItem,
   HealthResponse,
@@ -43,9 +43,12 @@ export interface EventsQueryParams {
   page_size: number;
   email?: string;
   dest_host?: string;
+  dest_host_match?: "contains" | "suffix";
   status?: string;
   detour?: string;
   is_domain?: boolean;
+  after_time?: string;
+  after_id?: number;
 }
 
 export async function queryEvents(params: EventsQueryParams): Promise<QueryResponse<AccessEventRow>> {
@@ -62,10 +65,12 @@ export interface ErrorsQueryParams {
   category?: string;
   include_noise?: boolean;
   keyword?: string;
+  keyword_fallback?: boolean;
+  after?: string;
 }
 
-export async function queryErrors(params: ErrorsQueryParams): Promise<QueryResponse<ErrorEventRow>> {
-  const { data } = await client.get<QueryResponse<ErrorEventRow>>("/errors/query", { params });
+export async function queryErrors(params: ErrorsQueryParams): Promise<ErrorsQueryResponse> {
+  const { data } = await client.get<ErrorsQueryResponse>("/errors/query", { params });
   return data;
 }
 
@@ -42,6 +42,10 @@ export interface QueryResponse<T> {
   page: number;
   page_size: number;
   items: T[];
+  next_after_time?: string | null;
+  next_after_id?: number | null;
+  has_more?: boolean;
+  next_after?: string | null;
 }
 
 export interface SummaryStats {
@@ -99,6 +103,11 @@ export interface ErrorEventRow {
   node_id: string;
 }
 
+export interface ErrorsQueryResponse extends Omit<QueryResponse<ErrorEventRow>, "total"> {
+  // null on cursor pages fetched without with_total.
+  total: number | null;
+}
+
 export interface ErrorCategoryHit {
   category: string;
   hits: number;
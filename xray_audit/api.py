@@ -1,10 +1,15 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
+import json
+import struct
 import threading
 import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
@@ -121,6 +126,7 @@ def startup() -> None:
 def shutdown() -> None:
     if collector is not None:
         collector.stop()
+    query_service.flush_auth_events()
 
 
 @app.middleware("http")
@@ -313,10 +319,19 @@ def config_history(
     request: Request,
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=50, ge=1, le=500),
+    after_time: str | None = Query(default=None),
+    after_id: int | None = Query(default=None),
 ) -> Dict[str, Any]:
     _require_user(request)
-    total, rows = query_service.runtime_config_history(page=page, page_size=page_size)
-    return {"total": total, "page": page, "page_size": page_size, "items": rows}
+    after = _parse_seek_or_400(after_time, after_id)
+    total, rows = query_service.runtime_config_history(page=page, page_size=page_size, after=after)
+    return {
+        "total": total,
+        "page": page,
+        "page_size": page_size,
+        "items": rows,
+        **_next_seek(rows, page_size, "changed_at"),
+    }
 
 
 @app.get("/")
@@ -386,6 +401,7 @@ def metrics(request: Request) -> PlainTextResponse:
         f"xray_audit_api_requests_5m {api_snapshot['requests_5m']}",
         f"xray_audit_api_responses_5xx_5m {api_snapshot['responses_5xx_5m']}",
         f"xray_audit_api_error_rate_5xx_5m {api_snapshot['error_rate_5xx_5m']}",
+        f"xray_audit_auth_events_dropped_total {query_service.auth_events_dropped}",
     ]
     if lag is not None:
         lines.append(f"xray_audit_collector_lag_seconds {lag}")
@@ -394,6 +410,8 @@ def metrics(request: Request) -> PlainTextResponse:
         db_last_write_latency_ms = float(local_stats.get("db_last_write_latency_ms", 0) or 0)
         lines.append(f"xray_audit_collector_db_write_fail_total {db_write_fail_total}")
         lines.append(f"xray_audit_collector_db_last_write_latency_ms {db_last_write_latency_ms}")
+        redis_dropped_batches = int(local_stats.get("redis_dropped_batches", 0) or 0)
+        lines.append(f"xray_audit_collector_redis_dropped_batches_total {redis_dropped_batches}")
     return PlainTextResponse(content="\n".join(lines) + "\n")
 
 
@@ -415,17 +433,23 @@ def query_events(
     to_ts: str = Query(alias="to"),
     email: str | None = Query(default=None),
     dest_host: str | None = Query(default=None),
+    dest_host_match: str = Query(default="contains"),
     status: str | None = Query(default=None),
     detour: str | None = Query(default=None),
     is_domain: bool | None = Query(default=None),
     page: int = Query(default=1),
     page_size: int = Query(default=50),
+    after_time: str | None = Query(default=None),
+    after_id: int | None = Query(default=None),
 ) -> Dict[str, Any]:
     _require_user(request)
     dt_from = _parse_datetime_or_400(from_ts, "from")
     dt_to = _parse_datetime_or_400(to_ts, "to")
     _validate_time_range(dt_from, dt_to)
     _validate_pagination(page=page, page_size=page_size, max_page_size=500)
+    after = _parse_seek_or_400(after_time, after_id)
+    if dest_host_match not in {"contains", "suffix"}:
+        raise HTTPException(status_code=400, detail="dest_host_match must be contains or suffix")
 
     total, rows = query_service.query_events(
         dt_from=dt_from,
@@ -437,6 +461,8 @@ def query_events(
         is_domain=is_domain,
         page=page,
         page_size=page_size,
+        dest_host_match=dest_host_match,
+        after=after,
     )
     return {
         "from": dt_from.isoformat(),
@@ -445,6 +471,7 @@ def query_events(
         "page": page,
         "page_size": page_size,
         "items": rows,
+        **_next_seek(rows, page_size, "event_time"),
     }
 
 
@@ -457,8 +484,11 @@ def user_visits(
     page: int = Query(default=1),
     page_size: int = Query(default=100),
     limit: int | None = Query(default=None),
+    after_time: str | None = Query(default=None),
+    after_id: int | None = Query(default=None),
 ) -> Dict[str, Any]:
     _require_user(request)
+    after = _parse_seek_or_400(after_time, after_id)
     dt_to = _parse_datetime_or_400(to_ts, "to") if to_ts else datetime.utcnow()
     dt_from = _parse_datetime_or_400(from_ts, "from") if from_ts else (dt_to - timedelta(days=1))
     _validate_time_range(dt_from, dt_to)
@@ -477,6 +507,7 @@ def user_visits(
         dt_to=dt_to,
         page=page,
         page_size=page_size,
+        after=after,
     )
     return {
         "email": email,
@@ -487,6 +518,7 @@ def user_visits(
         "page_size": page_size,
         "limit": page_size,
         "items": rows,
+        **_next_seek(rows, page_size, "event_time"),
     }
 
 
@@ -575,8 +607,11 @@ def query_errors(
     category: str | None = Query(default=None),
     include_noise: bool = Query(default=False),
     keyword: str | None = Query(default=None),
+    keyword_fallback: bool = Query(default=False),
     page: int = Query(default=1),
     page_size: int = Query(default=50),
+    after: str | None = Query(default=None),
+    with_total: bool = Query(default=False),
 ) -> Dict[str, Any]:
     _require_user(request)
     dt_from = _parse_datetime_or_400(from_ts, "from")
@@ -585,8 +620,18 @@ def query_errors(
     _validate_pagination(page=page, page_size=page_size, max_page_size=500)
     if level and level not in {"debug", "info", "warning", "error", "unknown"}:
         raise HTTPException(status_code=400, detail="invalid level")
+    cursor_filters = {
+        "from": dt_from,
+        "to": dt_to,
+        "level": level,
+        "category": category,
+        "include_noise": include_noise,
+        "keyword": (keyword or "").strip(),
+        "keyword_fallback": keyword_fallback,
+    }
+    seek = _decode_cursor_or_400(after, cursor_filters) if after else None
 
-    total, rows = query_service.query_error_events(
+    rows, has_more = query_service.query_error_events(
         dt_from=dt_from,
         dt_to=dt_to,
         level=level,
@@ -595,6 +640,26 @@ def query_errors(
         keyword=keyword,
         page=page,
         page_size=page_size,
+        after=seek,
+        keyword_fallback=keyword_fallback,
+    )
+    # Cursor pages skip the count unless asked; page-number clients still get one,
+    # and a last page that is not past the end already implies it.
+    total: Optional[int] = None
+    if seek is None and not has_more and (rows or page == 1):
+        total = (page - 1) * page_size + len(rows)
+    elif seek is None or with_total:
+        total = query_service.count_error_events(
+            dt_from=dt_from,
+            dt_to=dt_to,
+            level=level,
+            category=category,
+            include_noise=include_noise,
+            keyword=keyword,
+            keyword_fallback=keyword_fallback,
+        )
+    next_after = (
+        _encode_cursor(rows[-1]["event_time"], rows[-1]["id"], cursor_filters) if has_more and rows else None
     )
     return {
         "from": dt_from.isoformat(),
@@ -603,6 +668,8 @@ def query_errors(
         "page": page,
         "page_size": page_size,
         "items": rows,
+        "has_more": has_more,
+        "next_after": next_after,
     }
 
 
@@ -669,6 +736,71 @@ def _validate_pagination(page: int, page_size: int, max_page_size: int) -> None:
         raise HTTPException(status_code=400, detail=f"page_size must be between 1 and {max_page_size}")
 
 
+def _parse_seek_or_400(after_time: str | None, after_id: int | None) -> Optional[Tuple[datetime, int]]:
+    if after_time is None and after_id is None:
+        return None
+    if after_time is None or after_id is None:
+        raise HTTPException(status_code=400, detail="after_time and after_id must be provided together")
+    return _parse_datetime_or_400(after_time, "after_time"), after_id
+
+
+def _next_seek(rows: List[Dict[str, Any]], page_size: int, time_key: str) -> Dict[str, Any]:
+    # Cursor for the following page; absent once a short page shows there is nothing more.
+    if len(rows) < page_size:
+        return {"next_after_time": None, "next_after_id": None}
+    last = rows[-1]
+    last_time = last.get(time_key)
+    return {
+        "next_after_time": last_time.isoformat() if isinstance(last_time, datetime) else last_time,
+        "next_after_id": last.get("id"),
+    }
+
+
+_CURSOR_EPOCH = datetime(1970, 1, 1)
+# event_time in microseconds, row id, then an 8-byte digest of the filters the page was built with.
+_CURSOR_PAYLOAD = struct.Struct("<qQ8s")
+_CURSOR_MAC_BYTES = 8
+
+
+def _cursor_filter_hash(filters: Dict[str, Any]) -> bytes:
+    canonical = json.dumps(filters, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).digest()
+
+
+def _cursor_key() -> bytes:
+    # Derived rather than the JWT secret itself, so a cursor MAC is never a MAC under the session key.
+    return hmac.new(settings.auth_jwt_secret.encode("utf-8"), b"error-cursor", "sha256").digest()
+
+
+def _cursor_mac(payload: bytes) -> bytes:
+    return hmac.new(_cursor_key(), payload, "sha256").digest()[:_CURSOR_MAC_BYTES]
+
+
+def _encode_cursor(event_time: Any, row_id: Any, filters: Dict[str, Any]) -> str:
+    # Opaque to clients: they only hand it back as ?after= for the next page of the same search.
+    if not isinstance(event_time, datetime):
+        event_time = datetime.fromisoformat(str(event_time))
+    epoch_us = (event_time - _CURSOR_EPOCH) // timedelta(microseconds=1)
+    payload = _CURSOR_PAYLOAD.pack(epoch_us, int(row_id), _cursor_filter_hash(filters))
+    return base64.urlsafe_b64encode(payload + _cursor_mac(payload)).decode("ascii")
+
+
+def _decode_cursor_or_400(token: str, filters: Dict[str, Any]) -> Tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token.encode("ascii"))
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    if len(raw) != _CURSOR_PAYLOAD.size + _CURSOR_MAC_BYTES:
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    payload, mac = raw[: _CURSOR_PAYLOAD.size], raw[_CURSOR_PAYLOAD.size :]
+    if not hmac.compare_digest(mac, _cursor_mac(payload)):
+        raise HTTPException(status_code=400, detail="invalid cursor")
+    epoch_us, row_id, filter_hash = _CURSOR_PAYLOAD.unpack(payload)
+    if not hmac.compare_digest(filter_hash, _cursor_filter_hash(filters)):
+        raise HTTPException(status_code=400, detail="cursor does not match the current filters")
+    return _CURSOR_EPOCH + timedelta(microseconds=epoch_us), row_id
+
+
 def _parse_window_to_seconds(window: str) -> int:
     raw = window.strip().lower()
     if raw.endswith("h") and raw[:-1].isdigit():
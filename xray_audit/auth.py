@@ -37,11 +37,14 @@ class AuthService:
         if not username or not password:
             return
         password_hash = self.hash_password(password)
-        self.query_service.admin_user_create(
+        # Every API worker runs this at startup; only the one whose insert wins records the event.
+        created = self.query_service.admin_user_create(
             username=username,
             password_hash=password_hash,
             must_change_password=True,
         )
+        if not created:
+            return
         self.query_service.auth_event_insert(
             event_type="bootstrap_admin",
             username=username,
@@ -98,7 +98,12 @@ class AuditCollector:
 
     def stats_snapshot(self) -> Dict[str, Any]:
         with self._lock:
-            return self.stats.as_dict()
+            snapshot = self.stats.as_dict()
+        # Counted by the Redis writer thread, outside the collector lock.
+        redis_stats = self.redis_cache.stats()
+        snapshot["redis_dropped_batches"] = redis_stats["dropped_batches"]
+        snapshot["redis_last_write_error"] = redis_stats["last_write_error"]
+        return snapshot
 
     def _set_error(self, err: Exception) -> None:
         with self._lock:
@@ -123,16 +128,18 @@ class AuditCollector:
                 self.redis_cache.update_from_events(batch)
 
         inode, offset = self.tailer.state()
-        self.ingestor.save_state(self.settings.log_path, inode, offset)
+        states = [(self.settings.log_path, inode, offset)]
 
         error_written = 0
         error_inode: Optional[int] = None
         error_offset: int = 0
         if self.error_tailer is not None:
             error_inode, error_offset = self.error_tailer.state()
-            self.ingestor.save_state(self.settings.error_log_path, error_inode, error_offset)
             if error_batch:
                 error_written = self.ingestor.ingest_error_events(error_batch, node_id=self.settings.node_id)
+            states.append((self.settings.error_log_path, error_inode, error_offset))
+
+        self.ingestor.save_states(states)
 
         with self._lock:
             self.stats.batches_flushed += 1
@@ -313,7 +320,7 @@ class AuditCollector:
 
                 if not lines and not error_lines:
                     self._publish_health()
-                    time.sleep(poll_interval)
+                    self.tailer.wait_for_data(poll_interval)
             except Exception as err:
                 with self._lock:
                     self.stats.db_write_fail_total += 1
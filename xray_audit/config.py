@@ -52,12 +52,16 @@ class Settings:
     mysql_password: str
     mysql_db: str
     mysql_charset: str
+    mysql_pool_size: int
+    mysql_ingest_workers: int
 
     redis_url: str
     redis_enabled: bool
+    redis_pool_size: int
 
     api_host: str
     api_port: int
+    api_workers: int
     collector_embedded: bool
 
     drop_api_to_api: bool
@@ -124,10 +128,14 @@ class Settings:
             mysql_password=os.getenv("AUDIT_MYSQL_PASSWORD", "change-me"),
             mysql_db=os.getenv("AUDIT_MYSQL_DB", "xray_audit"),
             mysql_charset=os.getenv("AUDIT_MYSQL_CHARSET", "utf8mb4"),
+            mysql_pool_size=int(os.getenv("AUDIT_MYSQL_POOL_SIZE", "10")),
+            mysql_ingest_workers=int(os.getenv("AUDIT_MYSQL_INGEST_WORKERS", "4")),
             redis_url=os.getenv("AUDIT_REDIS_URL", "redis://127.0.0.1:6379/0"),
             redis_enabled=_env_bool("AUDIT_REDIS_ENABLED", True),
+            redis_pool_size=int(os.getenv("AUDIT_REDIS_POOL_SIZE", "16")),
             api_host=os.getenv("AUDIT_API_HOST", "127.0.0.1"),
             api_port=int(os.getenv("AUDIT_API_PORT", "8088")),
+            api_workers=int(os.getenv("AUDIT_API_WORKERS", "1")),
             collector_embedded=_env_bool("AUDIT_COLLECTOR_EMBEDDED", False),
             drop_api_to_api=_env_bool("AUDIT_DROP_API_TO_API", True),
             drop_loopback_traffic=_env_bool("AUDIT_DROP_LOOPBACK_TRAFFIC", True),
@@ -1,23 +1,62 @@
 from __future__ import annotations
 
 import json
+import queue
+import socket
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 import redis
 
 from .config import Settings
 from .models import ParsedEvent
 
+_MAINTENANCE_INTERVAL_SECONDS = 10.0
+# API handlers run on a threadpool larger than the pool; extra callers wait this long for a connection.
+_POOL_WAIT_TIMEOUT_SECONDS = 2.0
+
+
+def _encode_dt(value: Any) -> str:
+    return value.isoformat() if value is not None else ""
+
+
+def _encode_any(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+# Datetime fields of CollectorStats.as_dict(); everything else is a scalar.
+_HEALTH_ENCODERS: Dict[str, Callable[[Any], str]] = {
+    "started_at": _encode_dt,
+    "last_event_time": _encode_dt,
+    "last_error_event_time": _encode_dt,
+    "last_flush_time": _encode_dt,
+    "last_retention_time": _encode_dt,
+}
+
 
 class RedisCache:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
         self.enabled = settings.redis_enabled
         self.client = None
+        # Batches lost to a full writer queue (collector thread) or a failed Redis write
+        # (writer thread); both threads update them, so only under _stats_lock.
+        self.dropped_batches = 0
+        self.last_write_error = ""
+        self._stats_lock = threading.Lock()
+        self._writer_queue: "queue.Queue[List[ParsedEvent]]" = queue.Queue(maxsize=8)
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._last_maintenance_ts: float = 0.0
+
+        self._bytes_client = None
 
         if self.enabled:
-            self.client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+            self.client = redis.Redis(connection_pool=_build_pool(settings, decode_responses=True))
+            # Hot read paths decode only the member strings they return instead of every reply.
+            self._bytes_client = redis.Redis(connection_pool=_build_pool(settings, decode_responses=False))
 
     def _minute_bucket_key(self, event_time: datetime) -> str:
         return f"audit:domains:{self.settings.node_id}:{event_time.strftime('%Y%m%d%H%M')}"
@@ -36,16 +75,9 @@ class RedisCache:
             return
 
         key = self._health_key()
-        normalized: Dict[str, str] = {}
-        for k, v in payload.items():
-            if isinstance(v, datetime):
-                normalized[k] = v.isoformat()
-            elif v is None:
-                normalized[k] = ""
-            else:
-                normalized[k] = str(v)
+        normalized = {k: _HEALTH_ENCODERS.get(k, _encode_any)(v) for k, v in payload.items()}
 
-        with self.client.pipeline() as pipe:
+        with self.client.pipeline(transaction=False) as pipe:
             pipe.hset(key, mapping=normalized)
             pipe.expire(key, 300)
             pipe.execute()
@@ -58,13 +90,53 @@ class RedisCache:
         return data or None
 
     def update_from_events(self, events: List[ParsedEvent]) -> None:
+        # Realtime cache is a best-effort sidecar: never block the collector flush on Redis.
         if not self.client or not events:
             return
+        self._ensure_writer()
+        try:
+            self._writer_queue.put_nowait(events)
+        except queue.Full:
+            self._record_drop()
+
+    def _record_drop(self, error: Optional[str] = None) -> None:
+        with self._stats_lock:
+            self.dropped_batches += 1
+            if error is not None:
+                self.last_write_error = error
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {"dropped_batches": self.dropped_batches, "last_write_error": self.last_write_error}
 
+    def _ensure_writer(self) -> None:
+        if self._writer_thread is not None:
+            return
+        with self._writer_lock:
+            if self._writer_thread is None:
+                self._writer_thread = threading.Thread(
+                    target=self._writer_loop, daemon=True, name="xray-audit-redis-writer"
+                )
+                self._writer_thread.start()
+
+    def _writer_loop(self) -> None:
+        while True:
+            events = self._writer_queue.get()
+            try:
+                self._write_events(events)
+            except Exception as err:
+                # Drop the batch on Redis errors; MySQL remains the source of truth.
+                self._record_drop(str(err))
+            finally:
+                self._writer_queue.task_done()
+
+    def _write_events(self, events: List[ParsedEvent]) -> None:
         active_key = self._active_users_key()
         recent_key = self._recent_events_key()
         now_ts = int(datetime.utcnow().timestamp())
 
+        bucket_keys = set()
+
         with self.client.pipeline() as pipe:
             for ev in events:
                 compact = {
@@ -86,8 +158,9 @@ class RedisCache:
                     )
 
                     if a.dest_host:
-                        pipe.zincrby(self._minute_bucket_key(ev.event_time), 1, a.dest_host)
-                        pipe.expire(self._minute_bucket_key(ev.event_time), 900)
+                        bucket_key = self._minute_bucket_key(ev.event_time)
+                        pipe.zincrby(bucket_key, 1, a.dest_host)
+                        bucket_keys.add(bucket_key)
 
                     if a.user_email and a.user_email != "unknown":
                         pipe.zadd(active_key, {a.user_email: int(ev.event_time.timestamp())})
@@ -104,10 +177,17 @@ class RedisCache:
 
                 pipe.lpush(recent_key, json.dumps(compact, ensure_ascii=True))
 
-            pipe.ltrim(recent_key, 0, 999)
-            pipe.expire(recent_key, 900)
-            pipe.zremrangebyscore(active_key, 0, now_ts - 3600)
-            pipe.expire(active_key, 7200)
+            for bucket_key in bucket_keys:
+                pipe.expire(bucket_key, 900)
+
+            # Trimming is only needed periodically; running it on every small flush dominates the pipeline.
+            now_mono = time.monotonic()
+            if now_mono - self._last_maintenance_ts > _MAINTENANCE_INTERVAL_SECONDS:
+                pipe.ltrim(recent_key, 0, 999)
+                pipe.expire(recent_key, 900)
+                pipe.zremrangebyscore(active_key, 0, now_ts - 3600)
+                pipe.expire(active_key, 7200)
+                self._last_maintenance_ts = now_mono
             pipe.execute()
 
     def top_domains(self, minutes: int, limit: int) -> List[Dict[str, Any]]:
@@ -124,7 +204,7 @@ class RedisCache:
             return []
 
         temp_key = f"audit:tmp:domains:{self.settings.node_id}:{int(datetime.utcnow().timestamp())}"
-        with self.client.pipeline() as pipe:
+        with self._bytes_client.pipeline() as pipe:
             pipe.zunionstore(temp_key, existing)
             pipe.expire(temp_key, 10)
             pipe.zrevrange(temp_key, 0, max(0, limit - 1), withscores=True)
@@ -133,7 +213,7 @@ class RedisCache:
 
         out: List[Dict[str, Any]] = []
         for domain, score in values:
-            out.append({"domain": domain, "hits": int(score)})
+            out.append({"domain": domain.decode("utf-8"), "hits": int(score)})
         return out
 
     def active_users(self, seconds: int, limit: int) -> List[Dict[str, Any]]:
@@ -142,7 +222,7 @@ class RedisCache:
 
         key = self._active_users_key()
         now_ts = int(datetime.utcnow().timestamp())
-        rows = self.client.zrevrangebyscore(
+        rows = self._bytes_client.zrevrangebyscore(
             key,
             max=now_ts,
             min=max(0, now_ts - seconds),
@@ -153,5 +233,26 @@ class RedisCache:
 
         out: List[Dict[str, Any]] = []
         for email, score in rows:
-            out.append({"user_email": email, "last_seen_unix": int(score)})
+            out.append({"user_email": email.decode("utf-8"), "last_seen_unix": int(score)})
         return out
+
+
+def _build_pool(settings: Settings, decode_responses: bool) -> redis.ConnectionPool:
+    # Blocking: a burst beyond max_connections queues for a free connection instead of
+    # failing with "Too many connections".
+    return redis.BlockingConnectionPool.from_url(
+        settings.redis_url,
+        decode_responses=decode_responses,
+        max_connections=max(1, settings.redis_pool_size),
+        timeout=_POOL_WAIT_TIMEOUT_SECONDS,
+        socket_keepalive=True,
+        socket_keepalive_options=_keepalive_options(),
+        health_check_interval=30,
+    )
+
+
+def _keepalive_options() -> Dict[int, int]:
+    # TCP_KEEPIDLE is Linux-only; other platforms keep the OS default idle time.
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        return {socket.TCP_KEEPIDLE: 60}
+    return {}
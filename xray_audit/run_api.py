@@ -3,9 +3,36 @@ import uvicorn
 from .config import Settings
 
 
+def _pick_loop() -> str:
+    try:
+        import uvloop  # noqa: F401
+    except ImportError:
+        # uvloop is unavailable on Windows; fall back to the stock asyncio loop.
+        return "asyncio"
+    return "uvloop"
+
+
+def _pick_http() -> str:
+    try:
+        import httptools  # noqa: F401
+    except ImportError:
+        return "h11"
+    return "httptools"
+
+
 def main() -> None:
     settings = Settings.from_env()
-    uvicorn.run("xray_audit.api:app", host=settings.api_host, port=settings.api_port, reload=False)
+    # Every worker would start its own embedded collector tailing the same log.
+    workers = 1 if settings.collector_embedded else max(1, settings.api_workers)
+    uvicorn.run(
+        "xray_audit.api:app",
+        host=settings.api_host,
+        port=settings.api_port,
+        workers=workers,
+        loop=_pick_loop(),
+        http=_pick_http(),
+        log_level="warning",
+    )
 
 
 if __name__ == "__main__":
@@ -239,7 +239,13 @@ class RuntimeConfigManager:
         self.query_service = query_service
         self._lock = threading.Lock()
         self._defaults = _defaults_from_settings(settings)
+        self._default_csv_tuples: Dict[str, Tuple[str, ...]] = {
+            key: _split_csv(self._defaults.get(key, ""))
+            for key, field in EDITABLE_FIELDS.items()
+            if field.value_type == "csv"
+        }
         self._overrides: Dict[str, Any] = {}
+        self._typed: Dict[str, Tuple[str, ...]] = {}
         self._override_meta: Dict[str, Dict[str, Any]] = {}
         self._last_refresh = 0.0
         self._ttl_seconds = max(1.0, float(settings.runtime_config_refresh_seconds))
@@ -251,6 +257,7 @@ class RuntimeConfigManager:
                 return
             rows = self.query_service.runtime_config_all()
             overrides: Dict[str, Any] = {}
+            typed: Dict[str, Tuple[str, ...]] = {}
             meta: Dict[str, Dict[str, Any]] = {}
             for row in rows:
                 key = str(row.get("config_key", "") or "")
@@ -268,12 +275,15 @@ class RuntimeConfigManager:
                 except Exception:
                     continue
                 overrides[key] = value
+                if EDITABLE_FIELDS[key].value_type == "csv":
+                    typed[key] = _split_csv(value)
                 meta[key] = {
                     "updated_by": row.get("updated_by"),
                     "updated_at": row.get("updated_at"),
                 }
 
             self._overrides = overrides
+            self._typed = typed
             self._override_meta = meta
             self._last_refresh = now
 
@@ -310,11 +320,13 @@ class RuntimeConfigManager:
             return fallback
 
     def get_csv_tuple(self, key: str, fallback: Tuple[str, ...]) -> Tuple[str, ...]:
-        value = self.get(key, ",".join(fallback))
-        if isinstance(value, list):
-            return tuple(str(x).strip() for x in value if str(x).strip())
-        parts = [x.strip() for x in str(value).split(",")]
-        return tuple(x for x in parts if x)
+        # CSV values are split once at refresh time; this is read per collector loop.
+        self.refresh()
+        with self._lock:
+            typed = self._typed.get(key)
+        if typed is not None:
+            return typed
+        return self._default_csv_tuples.get(key, fallback)
 
     def schema_items(self) -> List[Dict[str, Any]]:
         out: List[Dict[str, Any]] = []
@@ -425,6 +437,13 @@ def _normalize_value(field: RuntimeConfigField, raw: Any) -> Any:
     return str(raw)
 
 
+def _split_csv(value: Any) -> Tuple[str, ...]:
+    if isinstance(value, list):
+        return tuple(str(x).strip() for x in value if str(x).strip())
+    parts = [x.strip() for x in str(value).split(",")]
+    return tuple(x for x in parts if x)
+
+
 def _check_range(field: RuntimeConfigField, value: float) -> None:
     if field.min_value is not None and value < field.min_value:
         raise ValueError(f"{field.config_key} must be >= {field.min_value}")
@@ -1,23 +1,107 @@
 from __future__ import annotations
 
-import json
+import hashlib
 import os
+import queue
 import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, List, Optional, Set, Tuple
 
+import orjson
 import pymysql
+from pymysql.constants import CLIENT
 
 from .config import Settings
 from .models import ParsedErrorEvent, ParsedEvent
 
+# Keep IN (...) lists well below max_allowed_packet and the optimizer's range limits.
+_ID_LOOKUP_CHUNK = 1000
+# Keeps geo cache lookups to one short, repeatable statement shape per chunk.
+_GEO_LOOKUP_CHUNK = 256
+# Rows per multi-row INSERT; raw lines are short, so this stays far below max_allowed_packet.
+_MULTIROW_CHUNK = 500
+# Below this many events per connection, fanning out costs more round trips than it saves.
+_MIN_INGEST_SHARD = 200
+# Tables trimmed by retention, with the indexed column that ages them out.
+# Access and DNS rows go with their raw row through ON DELETE CASCADE.
+_PRUNE_TABLES = (
+    ("audit_raw_events", "event_time"),
+    ("audit_error_events", "event_time"),
+    ("audit_error_minute_stats", "minute_ts"),
+    ("audit_auth_events", "event_time"),
+    ("audit_runtime_config_history", "changed_at"),
+)
+# Column order of the access, DNS and error INSERTs below; attrgetter builds each tuple
+# in C. PyMySQL renders the bool flags as 1/0 for the TINYINT(1) columns.
+_ACCESS_ROW = attrgetter(
+    "event_time", "user_email", "src", "dest_raw", "dest_host", "dest_port",
+    "status", "detour", "reason", "is_domain", "confidence",
+)
+_DNS_ROW = attrgetter("event_time", "dns_server", "domain", "ips_json", "dns_status", "elapsed_ms", "error_text")
+_ERROR_ROW = attrgetter(
+    "event_time", "level", "session_id", "component", "message", "src", "dest_raw", "dest_host",
+    "dest_port", "category", "signature_hash", "is_noise", "raw_line", "raw_hash",
+)
+# Auth events are written at most this long after the login that produced them.
+_AUTH_FLUSH_INTERVAL_SECONDS = 0.2
+_AUTH_FLUSH_MAX_EVENTS = 100
+# Backoff between attempts at writing one auth batch before falling back to row-by-row inserts.
+_AUTH_RETRY_DELAYS_SECONDS = (0.5, 2.0)
+_AUTH_SHUTDOWN_WAIT_SECONDS = 10.0
+# Paging through one filter re-uses its total instead of counting the window again.
+_COUNT_CACHE_TTL_SECONDS = 15.0
+# A connection released this recently is trusted without a ping round trip on borrow.
+_POOL_PING_AFTER_IDLE_SECONDS = 30.0
+# Dashboard aggregates are polled every few seconds by every open tab; a few seconds stale is fine.
+_DASHBOARD_CACHE_TTL_SECONDS = 5.0
+
+
+class _TTLCache:
+    def __init__(self, ttl_seconds: float, max_entries: int = 256) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._items: Dict[Any, Tuple[float, Any]] = {}
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                del self._items[key]
+                return None
+            return item[1]
+
+    def set(self, key: Any, value: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._items) >= self.max_entries and key not in self._items:
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+                if len(self._items) >= self.max_entries:
+                    self._items.pop(next(iter(self._items)))
+            self._items[key] = (now + self.ttl_seconds, value)
+
+    def discard(self, key: Any) -> None:
+        with self._lock:
+            self._items.pop(key, None)
+
 
 class MySQLFactory:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
+        # Idle entries are (released_at, conn) so recently used connections skip the ping.
+        self._idle: "queue.LifoQueue[Tuple[float, Any]]" = queue.LifoQueue(
+            maxsize=max(1, settings.mysql_pool_size)
+        )
 
-    def connect(self):
+    def connect(self, multi_statements: bool = False):
         return pymysql.connect(
             host=self.settings.mysql_host,
             port=self.settings.mysql_port,
@@ -27,28 +111,70 @@ class MySQLFactory:
             charset=self.settings.mysql_charset,
             autocommit=False,
             cursorclass=pymysql.cursors.DictCursor,
+            client_flag=CLIENT.MULTI_STATEMENTS if multi_statements else 0,
         )
 
+    @contextmanager
+    def pooled(self):
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                _, conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close_quietly(conn)
+
+    def _acquire(self):
+        try:
+            released_at, conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self.connect()
+        if time.monotonic() - released_at < _POOL_PING_AFTER_IDLE_SECONDS:
+            return conn
+        try:
+            conn.ping(reconnect=True)
+        except Exception:
+            _close_quietly(conn)
+            return self.connect()
+        return conn
+
+    def _release(self, conn) -> None:
+        # Rolling back ends any open read snapshot so the next borrower sees fresh data.
+        try:
+            conn.rollback()
+        except Exception:
+            _close_quietly(conn)
+            return
+        try:
+            self._idle.put_nowait((time.monotonic(), conn))
+        except queue.Full:
+            _close_quietly(conn)
+
 
 class MySQLIngestor:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
         self.factory = MySQLFactory(settings)
-        self.conn = self.factory.connect()
+        self._workers = max(1, min(settings.mysql_ingest_workers, settings.mysql_pool_size))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._autoinc_contiguous: Optional[bool] = None
+        self._error_minute_stats = False
+        self._error_minute_stats_warned = False
 
     def close(self) -> None:
-        if self.conn is not None:
-            self.conn.close()
-
-    def _ensure_conn(self) -> None:
-        try:
-            self.conn.ping(reconnect=True)
-        except Exception:
-            self.conn = self.factory.connect()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.factory.close()
 
     def load_state(self, file_path: str) -> Tuple[Optional[int], int]:
-        self._ensure_conn()
-        with self.conn.cursor() as cur:
+        with self.factory.pooled() as conn, conn.cursor() as cur:
             cur.execute(
                 "SELECT inode, last_offset FROM collector_state WHERE file_path=%s",
                 (file_path,),
@@ -59,287 +185,288 @@ class MySQLIngestor:
             return row.get("inode"), int(row.get("last_offset", 0))
 
     def save_state(self, file_path: str, inode: Optional[int], offset: int) -> None:
-        self._ensure_conn()
-        with self.conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO collector_state(file_path, inode, last_offset, updated_at)
-                VALUES(%s, %s, %s, NOW(6))
-                ON DUPLICATE KEY UPDATE inode=VALUES(inode), last_offset=VALUES(last_offset), updated_at=NOW(6)
-                """,
-                (file_path, inode, offset),
-            )
-        self.conn.commit()
+        self.save_states([(file_path, inode, offset)])
+
+    def save_states(self, states: List[Tuple[str, Optional[int], int]]) -> None:
+        if not states:
+            return
+        with self.factory.pooled() as conn:
+            with conn.cursor() as cur:
+                _insert_multirow(
+                    cur,
+                    "INSERT INTO collector_state(file_path, inode, last_offset, updated_at) VALUES ",
+                    "(%s, %s, %s, NOW(6))",
+                    states,
+                    " ON DUPLICATE KEY UPDATE inode=VALUES(inode), last_offset=VALUES(last_offset), updated_at=NOW(6)",
+                )
+            conn.commit()
 
     def ingest_events(self, events: List[ParsedEvent], node_id: str) -> Dict[str, int]:
         if not events:
             return {"raw": 0, "access": 0, "dns": 0}
-
-        self._ensure_conn()
-        raw_count = 0
-        access_count = 0
-        dns_count = 0
-
-        try:
-            with self.conn.cursor() as cur:
+        self._fill_missing_hashes(events)
+
+        shard_count = min(self._workers, len(events) // _MIN_INGEST_SHARD)
+        if shard_count <= 1:
+            return self._ingest_shard(events, node_id)
+
+        # Each shard writes its raw rows and their children on its own pooled
+        # connection, so round trips overlap. Shards are independent because
+        # child rows only reference raw rows from the same shard; a failed
+        # shard surfaces here and the whole batch is retried idempotently.
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="xray-audit-ingest")
+        # Route by raw_hash so duplicate lines never race each other's upsert.
+        shards: List[List[ParsedEvent]] = [[] for _ in range(shard_count)]
+        for ev in events:
+            shards[int(ev.raw_hash[:8], 16) % shard_count].append(ev)
+        futures = [self._executor.submit(self._ingest_shard, shard, node_id) for shard in shards]
+        totals = {"raw": 0, "access": 0, "dns": 0}
+        for future in futures:
+            for key, value in future.result().items():
+                totals[key] += value
+        return totals
+
+    def _ingest_shard(self, events: List[ParsedEvent], node_id: str) -> Dict[str, int]:
+        raw_rows: List[Tuple[Any, ...]] = []
+        access_rows: List[Tuple[Any, ...]] = []
+        dns_rows: List[Tuple[Any, ...]] = []
+
+        with self.factory.pooled() as conn:
+            # Nothing read here leaves the ingestor, so plain tuple rows are enough.
+            with conn.cursor(pymysql.cursors.Cursor) as cur:
+                # Replays after an offset rewind hit lines that are already stored together
+                # with their children, so only lines not seen before are written.
+                existing = self._raw_ids_by_hash(cur, [ev.raw_hash for ev in events], node_id)
+                fresh: Dict[str, ParsedEvent] = {}
                 for ev in events:
-                    cur.execute(
-                        """
-                        INSERT INTO audit_raw_events(event_time, event_type, raw_line, raw_hash, node_id, ingested_at)
-                        VALUES(%s, %s, %s, %s, %s, NOW(6))
-                        ON DUPLICATE KEY UPDATE id=LAST_INSERT_ID(id), raw_line=VALUES(raw_line)
-                        """,
-                        (ev.event_time, ev.event_type, ev.raw_line, ev.raw_hash, node_id),
+                    if ev.raw_hash not in existing:
+                        fresh.setdefault(ev.raw_hash, ev)
+                if not fresh:
+                    return {"raw": 0, "access": 0, "dns": 0}
+
+                fresh_events = list(fresh.values())
+                raw_rows = [(ev.event_time, ev.event_type, ev.raw_line, ev.raw_hash, node_id) for ev in fresh_events]
+                raw_head = "INSERT INTO audit_raw_events(event_time, event_type, raw_line, raw_hash, node_id, ingested_at) VALUES "
+                raw_row_sql = "(%s, %s, %s, %s, %s, NOW(6))"
+                if self._autoinc_is_contiguous(cur):
+                    # Each multi-row INSERT got one consecutive id block, in VALUES order. A plain
+                    # INSERT either writes every row or fails, so a racing duplicate aborts the
+                    # batch and the collector's retry filters it out above.
+                    first_ids = _insert_multirow(cur, raw_head, raw_row_sql, raw_rows)
+                    raw_ids = {
+                        ev.raw_hash: first_ids[i // _MULTIROW_CHUNK] + i % _MULTIROW_CHUNK
+                        for i, ev in enumerate(fresh_events)
+                    }
+                else:
+                    _insert_multirow(
+                        cur,
+                        raw_head,
+                        raw_row_sql,
+                        raw_rows,
+                        # raw_hash is derived from raw_line, so a duplicate already holds the same text.
+                        " ON DUPLICATE KEY UPDATE id=id",
                     )
-                    raw_id = int(cur.lastrowid)
-                    raw_count += 1
+                    raw_ids = self._raw_ids_by_hash(cur, list(fresh), node_id)
 
+                for ev in fresh_events:
                     if ev.access is not None:
-                        a = ev.access
-                        cur.execute(
-                            """
-                            INSERT INTO audit_access_events(
-                                raw_event_id, event_time, user_email, src, dest_raw, dest_host, dest_port,
-                                status, detour, reason, is_domain, confidence
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                            ON DUPLICATE KEY UPDATE
-                                user_email=VALUES(user_email),
-                                src=VALUES(src),
-                                dest_raw=VALUES(dest_raw),
-                                dest_host=VALUES(dest_host),
-                                dest_port=VALUES(dest_port),
-                                status=VALUES(status),
-                                detour=VALUES(detour),
-                                reason=VALUES(reason),
-                                is_domain=VALUES(is_domain),
-                                confidence=VALUES(confidence)
-                            """,
-                            (
-                                raw_id,
-                                a.event_time,
-                                a.user_email,
-                                a.src,
-                                a.dest_raw,
-                                a.dest_host,
-                                a.dest_port,
-                                a.status,
-                                a.detour,
-                                a.reason,
-                                1 if a.is_domain else 0,
-                                a.confidence,
-                            ),
-                        )
-                        access_count += 1
+                        access_rows.append((raw_ids[ev.raw_hash],) + _ACCESS_ROW(ev.access))
                     elif ev.dns is not None:
-                        d = ev.dns
-                        cur.execute(
-                            """
-                            INSERT INTO audit_dns_events(
-                                raw_event_id, event_time, dns_server, domain, ips_json, dns_status, elapsed_ms, error_text
-                            ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                            ON DUPLICATE KEY UPDATE
-                                dns_server=VALUES(dns_server),
-                                domain=VALUES(domain),
-                                ips_json=VALUES(ips_json),
-                                dns_status=VALUES(dns_status),
-                                elapsed_ms=VALUES(elapsed_ms),
-                                error_text=VALUES(error_text)
-                            """,
-                            (
-                                raw_id,
-                                d.event_time,
-                                d.dns_server,
-                                d.domain,
-                                d.ips_json,
-                                d.dns_status,
-                                d.elapsed_ms,
-                                d.error_text,
-                            ),
-                        )
-                        dns_count += 1
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
-
-        return {"raw": raw_count, "access": access_count, "dns": dns_count}
+                        dns_rows.append((raw_ids[ev.raw_hash],) + _DNS_ROW(ev.dns))
 
-    def ingest_error_events(self, events: List[ParsedErrorEvent], node_id: str) -> int:
-        if not events:
-            return 0
-
-        self._ensure_conn()
-        inserted = 0
-
-        try:
-            with self.conn.cursor() as cur:
-                for ev in events:
-                    cur.execute(
+                if access_rows:
+                    cur.executemany(
                         """
-                        INSERT INTO audit_error_events(
-                            event_time, level, session_id, component, message,
-                            src, dest_raw, dest_host, dest_port, category,
-                            signature_hash, is_noise, raw_line, raw_hash, node_id, ingested_at
-                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(6))
+                        INSERT INTO audit_access_events(
+                            raw_event_id, event_time, user_email, src, dest_raw, dest_host, dest_port,
+                            status, detour, reason, is_domain, confidence
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                         ON DUPLICATE KEY UPDATE
-                            level=VALUES(level),
-                            session_id=VALUES(session_id),
-                            component=VALUES(component),
-                            message=VALUES(message),
+                            user_email=VALUES(user_email),
                             src=VALUES(src),
                             dest_raw=VALUES(dest_raw),
                             dest_host=VALUES(dest_host),
                             dest_port=VALUES(dest_port),
-                            category=VALUES(category),
-                            signature_hash=VALUES(signature_hash),
-                            is_noise=VALUES(is_noise),
-                            raw_line=VALUES(raw_line),
-                            ingested_at=NOW(6)
+                            status=VALUES(status),
+                            detour=VALUES(detour),
+                            reason=VALUES(reason),
+                            is_domain=VALUES(is_domain),
+                            confidence=VALUES(confidence)
                         """,
-                        (
-                            ev.event_time,
-                            ev.level,
-                            ev.session_id,
-                            ev.component,
-                            ev.message,
-                            ev.src,
-                            ev.dest_raw,
-                            ev.dest_host,
-                            ev.dest_port,
-                            ev.category,
-                            ev.signature_hash,
-                            1 if ev.is_noise else 0,
-                            ev.raw_line,
-                            ev.raw_hash,
-                            node_id,
-                        ),
+                        access_rows,
                     )
-                    inserted += 1
-            self.conn.commit()
-        except Exception:
-            self.conn.rollback()
-            raise
+                if dns_rows:
+                    cur.executemany(
+                        """
+                        INSERT INTO audit_dns_events(
+                            raw_event_id, event_time, dns_server, domain, ips_json, dns_status, elapsed_ms, error_text
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            dns_server=VALUES(dns_server),
+                            domain=VALUES(domain),
+                            ips_json=VALUES(ips_json),
+                            dns_status=VALUES(dns_status),
+                            elapsed_ms=VALUES(elapsed_ms),
+                            error_text=VALUES(error_text)
+                        """,
+                        dns_rows,
+                    )
+            conn.commit()
 
-        return inserted
+        return {"raw": len(raw_rows), "access": len(access_rows), "dns": len(dns_rows)}
+
+    def _autoinc_is_contiguous(self, cur) -> bool:
+        # Ids of one multi-row INSERT are consecutive only with the "consecutive" lock mode
+        # (the MySQL 8 default of 2 interleaves concurrent inserts) and a step of 1.
+        if self._autoinc_contiguous is None:
+            cur.execute("SELECT @@innodb_autoinc_lock_mode, @@auto_increment_increment")
+            lock_mode, step = cur.fetchone()
+            self._autoinc_contiguous = int(lock_mode) <= 1 and int(step) == 1
+        return self._autoinc_contiguous
+
+    @staticmethod
+    def _hash(raw_line: str) -> str:
+        # Same digest as the parsers; hashlib uses OpenSSL, which picks SHA-NI where available.
+        return hashlib.sha256(raw_line.encode("utf-8", errors="replace")).hexdigest()
+
+    @classmethod
+    def _fill_missing_hashes(cls, events: List[Any]) -> None:
+        # Events rebuilt outside the parsers (re-ingest, backfill) may arrive without a hash;
+        # fill it in before a connection is borrowed so hashing never holds one open.
+        for ev in events:
+            if not ev.raw_hash:
+                ev.raw_hash = cls._hash(ev.raw_line)
+
+    @staticmethod
+    def _raw_ids_by_hash(cur, raw_hashes: List[str], node_id: str) -> Dict[str, int]:
+        unique_hashes = list(dict.fromkeys(raw_hashes))
+        out: Dict[str, int] = {}
+        for start in range(0, len(unique_hashes), _ID_LOOKUP_CHUNK):
+            chunk = unique_hashes[start : start + _ID_LOOKUP_CHUNK]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cur.execute(
+                f"SELECT id, raw_hash FROM audit_raw_events WHERE node_id=%s AND raw_hash IN ({placeholders})",
+                tuple([node_id] + chunk),
+            )
+            for raw_id, raw_hash in cur.fetchall():
+                out[raw_hash] = int(raw_id)
+        return out
 
-    def prune_old_events(self, retention_days: int, delete_batch_size: int) -> int:
-        if retention_days <= 0 or delete_batch_size <= 0:
+    def ingest_error_events(self, events: List[ParsedErrorEvent], node_id: str) -> int:
+        if not events:
             return 0
+        self._fill_missing_hashes(events)
 
-        self._ensure_conn()
-        total_deleted = 0
+        rows = [_ERROR_ROW(ev) + (node_id,) for ev in events]
 
-        while True:
-            try:
-                with self.conn.cursor() as cur:
-                    cur.execute(
+        with self.factory.pooled() as conn:
+            with conn.cursor(pymysql.cursors.Cursor) as cur:
+                # Only events not stored before feed the minute counters, so replays after an
+                # offset rewind do not count twice.
+                existing = self._error_keys(cur, events, node_id)
+                minute_hits: Dict[Tuple[Any, ...], int] = {}
+                for ev in events:
+                    event_key = (ev.raw_hash, ev.event_time)
+                    if event_key in existing:
+                        continue
+                    existing.add(event_key)
+                    bucket = (ev.event_time.replace(second=0, microsecond=0), ev.level, ev.category, ev.is_noise)
+                    minute_hits[bucket] = minute_hits.get(bucket, 0) + 1
+
+                _insert_multirow(
+                    cur,
+                    """
+                    INSERT INTO audit_error_events(
+                        event_time, level, session_id, component, message,
+                        src, dest_raw, dest_host, dest_port, category,
+                        signature_hash, is_noise, raw_line, raw_hash, node_id, ingested_at
+                    ) VALUES """,
+                    "(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(6))",
+                    rows,
+                    """
+                    ON DUPLICATE KEY UPDATE
+                        level=VALUES(level),
+                        session_id=VALUES(session_id),
+                        component=VALUES(component),
+                        message=VALUES(message),
+                        src=VALUES(src),
+                        dest_raw=VALUES(dest_raw),
+                        dest_host=VALUES(dest_host),
+                        dest_port=VALUES(dest_port),
+                        category=VALUES(category),
+                        signature_hash=VALUES(signature_hash),
+                        is_noise=VALUES(is_noise),
+                        ingested_at=NOW(6)
+                    """,
+                )
+                if minute_hits and self._has_error_minute_stats(cur):
+                    cur.executemany(
                         """
-                        DELETE FROM audit_raw_events
-                        WHERE id IN (
-                            SELECT id FROM (
-                                SELECT id
-                                FROM audit_raw_events
-                                WHERE event_time < (NOW(6) - INTERVAL %s DAY)
-                                ORDER BY id
-                                LIMIT %s
-                            ) t
-                        )
+                        INSERT INTO audit_error_minute_stats(minute_ts, level, category, is_noise, hits)
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE hits=hits + VALUES(hits)
                         """,
-                        (retention_days, delete_batch_size),
+                        [bucket + (hits,) for bucket, hits in minute_hits.items()],
                     )
-                    deleted = int(cur.rowcount)
-                self.conn.commit()
-            except Exception:
-                self.conn.rollback()
-                raise
-
-            total_deleted += deleted
-            if deleted < delete_batch_size:
-                break
+            conn.commit()
 
-        while True:
-            try:
-                with self.conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        DELETE FROM audit_error_events
-                        WHERE id IN (
-                            SELECT id FROM (
-                                SELECT id
-                                FROM audit_error_events
-                                WHERE event_time < (NOW(6) - INTERVAL %s DAY)
-                                ORDER BY id
-                                LIMIT %s
-                            ) t
-                        )
-                        """,
-                        (retention_days, delete_batch_size),
-                    )
-                    deleted = int(cur.rowcount)
-                self.conn.commit()
-            except Exception:
-                self.conn.rollback()
-                raise
-
-            total_deleted += deleted
-            if deleted < delete_batch_size:
-                break
+        return len(rows)
+
+    def _has_error_minute_stats(self, cur) -> bool:
+        # Running this build before migration 20261016 skips the counters instead of failing every
+        # flush. Re-probed on each flush until the table shows up, so counting resumes right after
+        # the migration without a restart.
+        if not self._error_minute_stats:
+            self._error_minute_stats = _table_exists(cur, "audit_error_minute_stats")
+            if not self._error_minute_stats and not self._error_minute_stats_warned:
+                self._error_minute_stats_warned = True
+                print(
+                    "[storage] audit_error_minute_stats is missing; error minute counters are skipped "
+                    "until sql/migrations/20261016_add_error_minute_stats.sql is applied."
+                )
+        return self._error_minute_stats
+
+    @staticmethod
+    def _error_keys(cur, events: List[ParsedErrorEvent], node_id: str) -> Set[Tuple[str, datetime]]:
+        unique_hashes = list(dict.fromkeys(ev.raw_hash for ev in events))
+        out: Set[Tuple[str, datetime]] = set()
+        for start in range(0, len(unique_hashes), _ID_LOOKUP_CHUNK):
+            chunk = unique_hashes[start : start + _ID_LOOKUP_CHUNK]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cur.execute(
+                f"SELECT raw_hash, event_time FROM audit_error_events WHERE raw_hash IN ({placeholders}) AND node_id=%s",
+                tuple(chunk + [node_id]),
+            )
+            out.update(cur.fetchall())
+        return out
 
-        while True:
-            try:
-                with self.conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        DELETE FROM audit_auth_events
-                        WHERE id IN (
-                            SELECT id FROM (
-                                SELECT id
-                                FROM audit_auth_events
-                                WHERE event_time < (NOW(6) - INTERVAL %s DAY)
-                                ORDER BY id
-                                LIMIT %s
-                            ) t
-                        )
-                        """,
-                        (retention_days, delete_batch_size),
-                    )
-                    deleted = int(cur.rowcount)
-                self.conn.commit()
-            except Exception:
-                self.conn.rollback()
-                raise
-
-            total_deleted += deleted
-            if deleted < delete_batch_size:
-                break
+    def prune_old_events(self, retention_days: int, delete_batch_size: int) -> int:
+        if retention_days <= 0 or delete_batch_size <= 0:
+            return 0
 
-        while True:
-            try:
-                with self.conn.cursor() as cur:
-                    cur.execute(
-                        """
-                        DELETE FROM audit_runtime_config_history
-                        WHERE id IN (
-                            SELECT id FROM (
-                                SELECT id
-                                FROM audit_runtime_config_history
-                                WHERE changed_at < (NOW(6) - INTERVAL %s DAY)
-                                ORDER BY id
-                                LIMIT %s
-                            ) t
-                        )
-                        """,
-                        (retention_days, delete_batch_size),
-                    )
-                    deleted = int(cur.rowcount)
-                self.conn.commit()
-            except Exception:
-                self.conn.rollback()
-                raise
-
-            total_deleted += deleted
-            if deleted < delete_batch_size:
-                break
+        total_deleted = 0
+        for table, time_column in _PRUNE_TABLES:
+            if table == "audit_error_minute_stats":
+                with self.factory.pooled() as conn, conn.cursor() as cur:
+                    if not self._has_error_minute_stats(cur):
+                        continue
+            # Walking the time index oldest-first lets each batch stop after LIMIT
+            # rows without materialising a derived table of ids.
+            sql = (
+                f"DELETE FROM {table} WHERE {time_column} < (NOW(6) - INTERVAL %s DAY) "
+                f"ORDER BY {time_column} LIMIT %s"
+            )
+            while True:
+                with self.factory.pooled() as conn:
+                    with conn.cursor() as cur:
+                        cur.execute(sql, (retention_days, delete_batch_size))
+                        deleted = int(cur.rowcount)
+                    conn.commit()
+
+                total_deleted += deleted
+                if deleted < delete_batch_size:
+                    break
 
         return total_deleted
 
@@ -348,14 +475,41 @@ class AuditQueryService:
     def __init__(self, settings: Settings) -> None:
         self.settings = settings
         self.factory = MySQLFactory(settings)
+        self._count_cache = _TTLCache(_COUNT_CACHE_TTL_SECONDS)
+        self._dashboard_cache = _TTLCache(_DASHBOARD_CACHE_TTL_SECONDS)
+        # None until probed; then the FULLTEXT min token size, or 0 when the index is missing.
+        self._error_ft_min_token: Optional[int] = None
+        self._error_minute_stats = False
+        self.auth_events_dropped = 0
+        self._auth_queue: "queue.Queue[Tuple[Any, ...]]" = queue.Queue(maxsize=10000)
+        self._auth_writer_thread: Optional[threading.Thread] = None
+        self._auth_writer_lock = threading.Lock()
 
-    @contextmanager
     def _conn(self):
-        conn = self.factory.connect()
-        try:
-            yield conn
-        finally:
-            conn.close()
+        return self.factory.pooled()
+
+    def _page_total(
+        self,
+        cur,
+        cache_key: Tuple[Any, ...],
+        count_sql: str,
+        params: Tuple[Any, ...],
+        offset: Optional[int],
+        page_size: int,
+        rows: List[Dict[str, Any]],
+    ) -> int:
+        # A short page that is not past the end already tells us the total; keyset pages
+        # (offset None) do not know how many rows came before them.
+        if offset is not None and len(rows) < page_size and (rows or offset == 0):
+            total = offset + len(rows)
+        else:
+            total = self._count_cache.get(cache_key)
+            if total is not None:
+                return total
+            cur.execute(count_sql, params)
+            total = int(cur.fetchone()["total"] or 0)
+        self._count_cache.set(cache_key, total)
+        return total
 
     def collector_state(self, file_path: str) -> Optional[Dict[str, Any]]:
         with self._conn() as conn, conn.cursor() as cur:
@@ -385,18 +539,23 @@ class AuditQueryService:
             )
             return cur.fetchone()
 
-    def admin_user_create(self, username: str, password_hash: str, must_change_password: bool = False) -> None:
+    def admin_user_create(self, username: str, password_hash: str, must_change_password: bool = False) -> bool:
+        # Returns False when the username already exists, e.g. another API worker bootstrapped it first.
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO audit_admin_users(
-                    username, password_hash, token_version, is_enabled, must_change_password, created_at, updated_at
+            try:
+                cur.execute(
+                    """
+                    INSERT INTO audit_admin_users(
+                        username, password_hash, token_version, is_enabled, must_change_password, created_at, updated_at
+                    )
+                    VALUES (%s, %s, 0, 1, %s, NOW(6), NOW(6))
+                    """,
+                    (username, password_hash, 1 if must_change_password else 0),
                 )
-                VALUES (%s, %s, 0, 1, %s, NOW(6), NOW(6))
-                """,
-                (username, password_hash, 1 if must_change_password else 0),
-            )
+            except pymysql.err.IntegrityError:
+                return False
             conn.commit()
+            return True
 
     def admin_user_update_login_success(self, username: str) -> None:
         with self._conn() as conn, conn.cursor() as cur:
@@ -435,14 +594,87 @@ class AuditQueryService:
             conn.commit()
 
     def auth_event_insert(self, event_type: str, username: str, source_ip: str, user_agent: str) -> None:
-        with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                INSERT INTO audit_auth_events(event_type, username, source_ip, user_agent, event_time)
-                VALUES (%s, %s, %s, %s, NOW(6))
-                """,
-                (event_type, username, source_ip, user_agent),
-            )
+        # Login handlers only enqueue; a background writer batches the INSERTs.
+        row = (event_type, username, source_ip, user_agent, datetime.utcnow())
+        self._ensure_auth_writer()
+        try:
+            self._auth_queue.put_nowait(row)
+        except queue.Full:
+            self._insert_auth_events([row])
+
+    def flush_auth_events(self) -> None:
+        batch: List[Tuple[Any, ...]] = []
+        while True:
+            try:
+                batch.append(self._auth_queue.get_nowait())
+            except queue.Empty:
+                break
+        if batch:
+            self._write_auth_batch(batch)
+        # Wait for a batch the writer already dequeued, so shutdown does not cut it off.
+        deadline = time.monotonic() + _AUTH_SHUTDOWN_WAIT_SECONDS
+        with self._auth_queue.all_tasks_done:
+            while self._auth_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._auth_queue.all_tasks_done.wait(remaining)
+
+    def _ensure_auth_writer(self) -> None:
+        if self._auth_writer_thread is not None:
+            return
+        with self._auth_writer_lock:
+            if self._auth_writer_thread is None:
+                self._auth_writer_thread = threading.Thread(
+                    target=self._auth_writer_loop, daemon=True, name="xray-audit-auth-writer"
+                )
+                self._auth_writer_thread.start()
+
+    def _auth_writer_loop(self) -> None:
+        while True:
+            batch = [self._auth_queue.get()]
+            deadline = time.monotonic() + _AUTH_FLUSH_INTERVAL_SECONDS
+            while len(batch) < _AUTH_FLUSH_MAX_EVENTS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._auth_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write_auth_batch(batch)
+
+    def _write_auth_batch(self, batch: List[Tuple[Any, ...]]) -> None:
+        # Auth rows are the audit trail for logins and password changes: retry transient
+        # MySQL errors, then insert row by row so one bad row cannot sink the others.
+        try:
+            for delay in _AUTH_RETRY_DELAYS_SECONDS + (None,):
+                try:
+                    self._insert_auth_events(batch)
+                    return
+                except Exception:
+                    if delay is None:
+                        break
+                    time.sleep(delay)
+            for row in batch:
+                try:
+                    self._insert_auth_events([row])
+                except Exception:
+                    self.auth_events_dropped += 1
+        finally:
+            for _ in batch:
+                self._auth_queue.task_done()
+
+    def _insert_auth_events(self, rows: List[Tuple[Any, ...]]) -> None:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO audit_auth_events(event_type, username, source_ip, user_agent, event_time)
+                    VALUES (%s, %s, %s, %s, %s)
+                    """,
+                    rows,
+                )
             conn.commit()
 
     def runtime_config_all(self) -> List[Dict[str, Any]]:
@@ -459,54 +691,71 @@ class AuditQueryService:
     def runtime_config_upsert(self, values: Dict[str, Any], changed_by: str, source_ip: str) -> None:
         if not values:
             return
-        with self._conn() as conn, conn.cursor() as cur:
-            for key, value in values.items():
-                cur.execute(
-                    "SELECT value_json FROM audit_runtime_config WHERE config_key=%s LIMIT 1",
-                    (key,),
-                )
-                old_row = cur.fetchone()
-                old_json = old_row.get("value_json") if old_row else None
-                new_json = json.dumps(value, ensure_ascii=False)
-                value_type = type(value).__name__
-                cur.execute(
-                    """
-                    INSERT INTO audit_runtime_config(config_key, value_json, value_type, scope, updated_by, updated_at)
-                    VALUES (%s, %s, %s, %s, %s, NOW(6))
-                    ON DUPLICATE KEY UPDATE
-                        value_json=VALUES(value_json),
-                        value_type=VALUES(value_type),
-                        scope=VALUES(scope),
-                        updated_by=VALUES(updated_by),
-                        updated_at=NOW(6)
-                    """,
-                    (key, new_json, value_type, "runtime", changed_by),
-                )
-                cur.execute(
-                    """
-                    INSERT INTO audit_runtime_config_history(
-                        config_key, old_value_json, new_value_json, changed_by, source_ip, changed_at
-                    ) VALUES (%s, %s, %s, %s, %s, NOW(6))
-                    """,
-                    (key, old_json, new_json, changed_by, source_ip),
-                )
+        new_json = {key: orjson.dumps(value, option=orjson.OPT_SORT_KEYS).decode() for key, value in values.items()}
+        with self._conn() as conn, conn.cursor(pymysql.cursors.Cursor) as cur:
+            placeholders = ", ".join(["%s"] * len(new_json))
+            cur.execute(
+                f"SELECT config_key, value_json FROM audit_runtime_config WHERE config_key IN ({placeholders})",
+                tuple(new_json),
+            )
+            old_json: Dict[str, Any] = dict(cur.fetchall())
+            # Re-saving an unchanged value would only add a no-op history entry.
+            keys = [key for key in new_json if _canonical_json(old_json.get(key)) != new_json[key]]
+            if not keys:
+                return
+            _insert_multirow(
+                cur,
+                "INSERT INTO audit_runtime_config(config_key, value_json, value_type, scope, updated_by, updated_at) VALUES ",
+                "(%s, %s, %s, %s, %s, NOW(6))",
+                [(key, new_json[key], type(values[key]).__name__, "runtime", changed_by) for key in keys],
+                """
+                ON DUPLICATE KEY UPDATE
+                    value_json=VALUES(value_json),
+                    value_type=VALUES(value_type),
+                    scope=VALUES(scope),
+                    updated_by=VALUES(updated_by),
+                    updated_at=NOW(6)
+                """,
+            )
+            _insert_multirow(
+                cur,
+                """
+                INSERT INTO audit_runtime_config_history(
+                    config_key, old_value_json, new_value_json, changed_by, source_ip, changed_at
+                ) VALUES """,
+                "(%s, %s, %s, %s, %s, NOW(6))",
+                [(key, old_json.get(key), new_json[key], changed_by, source_ip) for key in keys],
+            )
             conn.commit()
+        self._count_cache.discard(("runtime_config_history",))
 
-    def runtime_config_history(self, page: int, page_size: int) -> Tuple[int, List[Dict[str, Any]]]:
-        offset = (page - 1) * page_size
+    def runtime_config_history(
+        self, page: int, page_size: int, after: Optional[Tuple[datetime, int]] = None
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        offset = (page - 1) * page_size if after is None else None
+        seek_sql, seek_params = _seek_clause("changed_at", "id", after, "WHERE")
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute("SELECT COUNT(*) AS total FROM audit_runtime_config_history")
-            total = int(cur.fetchone()["total"] or 0)
             cur.execute(
-                """
+                f"""
                 SELECT id, config_key, old_value_json, new_value_json, changed_by, source_ip, changed_at
                 FROM audit_runtime_config_history
+                {seek_sql}
                 ORDER BY changed_at DESC, id DESC
                 LIMIT %s OFFSET %s
                 """,
-                (page_size, offset),
+                seek_params + (page_size, offset or 0),
+            )
+            rows = list(cur.fetchall())
+            total = self._page_total(
+                cur,
+                ("runtime_config_history",),
+                "SELECT COUNT(*) AS total FROM audit_runtime_config_history",
+                (),
+                offset,
+                page_size,
+                rows,
             )
-            return total, list(cur.fetchall())
+            return total, rows
 
     def recent_events(self, seconds: int, limit: int) -> List[Dict[str, Any]]:
         with self._conn() as conn, conn.cursor() as cur:
@@ -573,24 +822,21 @@ class AuditQueryService:
             return list(cur.fetchall())
 
     def user_visits_paged(
-        self, email: str, dt_from: datetime, dt_to: datetime, page: int, page_size: int
+        self,
+        email: str,
+        dt_from: datetime,
+        dt_to: datetime,
+        page: int,
+        page_size: int,
+        after: Optional[Tuple[datetime, int]] = None,
     ) -> Tuple[int, List[Dict[str, Any]]]:
-        offset = (page - 1) * page_size
+        offset = (page - 1) * page_size if after is None else None
+        seek_sql, seek_params = _seek_clause("event_time", "id", after, "AND")
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
-                """
-                SELECT COUNT(*) AS total
-                FROM audit_access_events
-                WHERE user_email = %s
-                  AND event_time >= %s
-                  AND event_time <= %s
-                """,
-                (email, dt_from, dt_to),
-            )
-            total = int(cur.fetchone()["total"])
-            cur.execute(
-                """
+                f"""
                 SELECT
+                    id,
                     event_time,
                     user_email,
                     src,
@@ -606,12 +852,29 @@ class AuditQueryService:
                 WHERE user_email = %s
                     AND event_time >= %s
                     AND event_time <= %s
+                    {seek_sql}
                 ORDER BY event_time DESC, id DESC
                 LIMIT %s OFFSET %s
                 """,
-                (email, dt_from, dt_to, page_size, offset),
+                (email, dt_from, dt_to) + seek_params + (page_size, offset or 0),
+            )
+            rows = list(cur.fetchall())
+            total = self._page_total(
+                cur,
+                ("user_visits", email, dt_from, dt_to),
+                """
+                SELECT COUNT(*) AS total
+                FROM audit_access_events
+                WHERE user_email = %s
+                  AND event_time >= %s
+                  AND event_time <= %s
+                """,
+                (email, dt_from, dt_to),
+                offset,
+                page_size,
+                rows,
             )
-            return total, list(cur.fetchall())
+            return total, rows
 
     def query_events(
         self,
@@ -624,73 +887,42 @@ class AuditQueryService:
         is_domain: Optional[bool],
         page: int,
         page_size: int,
+        dest_host_match: str = "contains",
+        after: Optional[Tuple[datetime, int]] = None,
     ) -> Tuple[int, List[Dict[str, Any]]]:
-        filters: List[str] = ["r.event_type = %s", "r.event_time >= %s", "r.event_time <= %s"]
         params: List[Any] = ["access", dt_from, dt_to]
-
-        if email:
-            filters.append("a.user_email = %s")
-            params.append(email)
-        if dest_host:
-            filters.append("a.dest_host LIKE %s")
-            params.append(f"%{dest_host}%")
-        if status:
-            filters.append("a.status = %s")
-            params.append(status)
-        if detour:
-            filters.append("a.detour LIKE %s")
-            params.append(f"%{detour}%")
-        if is_domain is not None:
-            filters.append("a.is_domain = %s")
-            params.append(1 if is_domain else 0)
-
-        where_sql = " AND ".join(filters)
-        joins_sql = """
-            FROM audit_raw_events r
-            LEFT JOIN audit_access_events a ON a.raw_event_id = r.id
-            LEFT JOIN audit_dns_events d ON d.raw_event_id = r.id
-        """
-        offset = (page - 1) * page_size
+        suffix = bool(dest_host) and dest_host_match == "suffix"
+        optional = (
+            (bool(email), email),
+            (bool(dest_host) and not suffix, f"%{dest_host}%"),
+            (bool(status), status),
+            (bool(detour), f"%{detour}%"),
+            (is_domain is not None, 1 if is_domain else 0),
+            # A suffix of dest_host is a prefix of its reverse, which the B-tree can range-scan.
+            (suffix, _escape_like((dest_host or "")[::-1]) + "%"),
+        )
+        mask = 0
+        for bit, (active, value) in enumerate(optional):
+            if active:
+                mask |= 1 << bit
+                params.append(value)
+        page_sql, count_sql = _query_events_sql(mask, after is not None)
+        offset = (page - 1) * page_size if after is None else None
+        seek_params = (after[0], after[0], after[1]) if after is not None else ()
 
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                f"SELECT COUNT(*) AS total {joins_sql} WHERE {where_sql}",
+            cur.execute(page_sql, tuple(params) + seek_params + (page_size, offset or 0))
+            rows = list(cur.fetchall())
+            total = self._page_total(
+                cur,
+                ("query_events", mask) + tuple(params),
+                count_sql,
                 tuple(params),
+                offset,
+                page_size,
+                rows,
             )
-            total = int(cur.fetchone()["total"])
-
-            cur.execute(
-                f"""
-                SELECT
-                    r.id,
-                    r.event_time,
-                    r.event_type,
-                    r.raw_line,
-                    r.node_id,
-                    a.user_email,
-                    a.src,
-                    a.dest_raw,
-                    a.dest_host,
-                    a.dest_port,
-                    a.status,
-                    a.detour,
-                    a.reason,
-                    a.is_domain,
-                    a.confidence,
-                    d.dns_server,
-                    d.domain,
-                    d.ips_json,
-                    d.dns_status,
-                    d.elapsed_ms,
-                    d.error_text
-                {joins_sql}
-                WHERE {where_sql}
-                ORDER BY r.event_time DESC, r.id DESC
-                LIMIT %s OFFSET %s
-                """,
-                tuple(params + [page_size, offset]),
-            )
-            return total, list(cur.fetchall())
+            return total, rows
 
     def list_users(
         self, dt_from: datetime, dt_to: datetime, page: int, page_size: int
@@ -698,30 +930,14 @@ class AuditQueryService:
         offset = (page - 1) * page_size
         common_params = (dt_from, dt_to)
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT COUNT(*) AS total
-                FROM (
-                    SELECT user_email
-                    FROM audit_access_events
-                    WHERE event_time >= %s
-                      AND event_time <= %s
-                      AND user_email <> ''
-                      AND user_email <> 'unknown'
-                    GROUP BY user_email
-                ) t
-                """,
-                common_params,
-            )
-            total = int(cur.fetchone()["total"])
-
+            # Pass 1 ranks users with plain counters only; the per-user distinct host sets
+            # are built afterwards for the page's users instead of for every user in the window.
             cur.execute(
                 """
                 SELECT
                     user_email,
                     COUNT(*) AS count,
-                    MAX(event_time) AS last_seen,
-                    COUNT(DISTINCT CASE WHEN dest_host <> '' THEN dest_host ELSE NULL END) AS unique_dest_host_count
+                    MAX(event_time) AS last_seen
                 FROM audit_access_events
                 WHERE event_time >= %s
                   AND event_time <= %s
@@ -733,28 +949,62 @@ class AuditQueryService:
                 """,
                 (dt_from, dt_to, page_size, offset),
             )
-            return total, list(cur.fetchall())
+            rows = list(cur.fetchall())
+
+            if rows:
+                emails = [row["user_email"] for row in rows]
+                placeholders = ", ".join(["%s"] * len(emails))
+                with conn.cursor(pymysql.cursors.Cursor) as count_cur:
+                    count_cur.execute(
+                        f"""
+                        SELECT user_email, COUNT(DISTINCT dest_host) AS unique_dest_host_count
+                        FROM audit_access_events
+                        WHERE user_email IN ({placeholders})
+                          AND event_time >= %s
+                          AND event_time <= %s
+                          AND dest_host <> ''
+                        GROUP BY user_email
+                        """,
+                        tuple(emails) + common_params,
+                    )
+                    unique_counts = dict(count_cur.fetchall())
+                for row in rows:
+                    row["unique_dest_host_count"] = unique_counts.get(row["user_email"], 0)
+
+            total = self._page_total(
+                cur,
+                ("list_users",) + common_params,
+                """
+                SELECT COUNT(DISTINCT user_email) AS total
+                FROM audit_access_events
+                WHERE event_time >= %s
+                  AND event_time <= %s
+                  AND user_email <> ''
+                  AND user_email <> 'unknown'
+                """,
+                common_params,
+                offset,
+                page_size,
+                rows,
+            )
+            return total, rows
 
     def summary_stats(self, window_seconds: int) -> Dict[str, Any]:
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
                 SELECT
-                    (SELECT COUNT(*)
-                     FROM audit_access_events
-                     WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)) AS total_events,
-                    (SELECT COUNT(DISTINCT user_email)
-                     FROM audit_access_events
-                     WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)
-                       AND user_email <> ''
-                       AND user_email <> 'unknown') AS unique_users,
-                    (SELECT COUNT(DISTINCT dest_host)
-                     FROM audit_access_events
-                     WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)
-                       AND dest_host <> ''
-                       AND is_domain = 1) AS unique_domains
+                    COUNT(*) AS total_events,
+                    COUNT(DISTINCT CASE
+                        WHEN user_email <> '' AND user_email <> 'unknown' THEN user_email
+                    END) AS unique_users,
+                    COUNT(DISTINCT CASE
+                        WHEN dest_host <> '' AND is_domain = 1 THEN dest_host
+                    END) AS unique_domains
+                FROM audit_access_events
+                WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)
                 """,
-                (window_seconds, window_seconds, window_seconds),
+                (window_seconds,),
             )
             row = cur.fetchone()
 
@@ -777,115 +1027,165 @@ class AuditQueryService:
         keyword: Optional[str],
         page: int,
         page_size: int,
-    ) -> Tuple[int, List[Dict[str, Any]]]:
-        filters: List[str] = ["event_time >= %s", "event_time <= %s"]
-        params: List[Any] = [dt_from, dt_to]
-
-        if level:
-            filters.append("level = %s")
-            params.append(level)
-        if category:
-            filters.append("category = %s")
-            params.append(category)
-        if not include_noise:
-            filters.append("is_noise = 0")
-
-        offset = (page - 1) * page_size
+        after: Optional[Tuple[datetime, int]] = None,
+        keyword_fallback: bool = False,
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        offset = (page - 1) * page_size if after is None else 0
+        seek_params = (after[0], after[0], after[1]) if after is not None else ()
+        with self._conn() as conn, conn.cursor() as cur:
+            mask, keyword_kind, params = self._error_filters(
+                cur, dt_from, dt_to, level, category, include_noise, keyword, keyword_fallback
+            )
+            page_sql, _ = _error_events_sql(mask, keyword_kind, after is not None)
+            # One extra row tells whether another page exists without counting.
+            cur.execute(page_sql, params + seek_params + (page_size + 1, offset))
+            rows = list(cur.fetchall())
+        return rows[:page_size], len(rows) > page_size
 
-        def _run_query(extra_filter: str | None, extra_params: List[Any]) -> Tuple[int, List[Dict[str, Any]]]:
-            where_parts = list(filters)
-            query_params: List[Any] = list(params)
-            if extra_filter:
-                where_parts.append(extra_filter)
-                query_params.extend(extra_params)
-            where_sql = " AND ".join(where_parts)
-            with self._conn() as conn, conn.cursor() as cur:
-                cur.execute(f"SELECT COUNT(*) AS total FROM audit_error_events WHERE {where_sql}", tuple(query_params))
-                total = int(cur.fetchone()["total"])
-                cur.execute(
-                    f"""
-                    SELECT
-                        id,
-                        event_time,
-                        level,
-                        session_id,
-                        component,
-                        message,
-                        src,
-                        dest_raw,
-                        dest_host,
-                        dest_port,
-                        category,
-                        signature_hash,
-                        is_noise,
-                        node_id
-                    FROM audit_error_events
-                    WHERE {where_sql}
-                    ORDER BY event_time DESC, id DESC
-                    LIMIT %s OFFSET %s
-                    """,
-                    tuple(query_params + [page_size, offset]),
-                )
-                return total, list(cur.fetchall())
+    def count_error_events(
+        self,
+        dt_from: datetime,
+        dt_to: datetime,
+        level: Optional[str],
+        category: Optional[str],
+        include_noise: bool,
+        keyword: Optional[str],
+        keyword_fallback: bool = False,
+    ) -> int:
+        cache_key = (
+            "error_events", dt_from, dt_to, level, category, include_noise, (keyword or "").strip(), keyword_fallback
+        )
+        total = self._count_cache.get(cache_key)
+        if total is not None:
+            return total
+        with self._conn() as conn, conn.cursor() as cur:
+            mask, keyword_kind, params = self._error_filters(
+                cur, dt_from, dt_to, level, category, include_noise, keyword, keyword_fallback
+            )
+            cur.execute(_error_events_sql(mask, keyword_kind)[1], params)
+            total = int(cur.fetchone()["total"] or 0)
+        self._count_cache.set(cache_key, total)
+        return total
 
-        if not keyword:
-            return _run_query(None, [])
+    def _error_filters(
+        self,
+        cur,
+        dt_from: datetime,
+        dt_to: datetime,
+        level: Optional[str],
+        category: Optional[str],
+        include_noise: bool,
+        keyword: Optional[str],
+        keyword_fallback: bool,
+    ) -> Tuple[int, str, Tuple[Any, ...]]:
+        # Returns the _ERROR_EVENTS_FILTERS mask, the _ERROR_KEYWORD_FILTERS key and the bound params.
+        params: List[Any] = [dt_from, dt_to]
+        mask = 0
+        optional = ((bool(level), level), (bool(category), category))
+        for bit, (active, value) in enumerate(optional):
+            if active:
+                mask |= 1 << bit
+                params.append(value)
+        if not include_noise:
+            mask |= 1 << 2
 
-        keyword_raw = keyword.strip()
+        keyword_raw = (keyword or "").strip()
         if not keyword_raw:
-            return _run_query(None, [])
+            return mask, "", tuple(params)
 
         fulltext_query = _to_fulltext_query(keyword_raw)
-        if fulltext_query:
-            try:
-                total, rows = _run_query(
-                    "MATCH(component, message, src, dest_raw) AGAINST (%s IN BOOLEAN MODE)",
-                    [fulltext_query],
-                )
-                if total > 0:
-                    return total, rows
-            except pymysql.MySQLError:
-                # Fallback to LIKE when FULLTEXT index is unavailable.
-                pass
+        if fulltext_query and self._fulltext_usable(cur, keyword_raw):
+            if not keyword_fallback:
+                return mask, "fulltext", tuple(params + [fulltext_query])
+            # Decided without paging, so every page and the count of one search agree.
+            cur.execute(
+                f"SELECT 1 FROM audit_error_events WHERE {_error_events_where(mask, 'fulltext')} LIMIT 1",
+                tuple(params + [fulltext_query]),
+            )
+            if cur.fetchone():
+                return mask, "fulltext", tuple(params + [fulltext_query])
 
         kw = f"%{keyword_raw}%"
-        return _run_query(
-            "(component LIKE %s OR message LIKE %s OR src LIKE %s OR dest_raw LIKE %s)",
-            [kw, kw, kw, kw],
+        return mask, "like", tuple(params + [kw, kw, kw, kw])
+
+    def _fulltext_usable(self, cur, keyword_raw: str) -> bool:
+        # IPs, host:port and host fragments are split on '.', ':' and '-' by the FULLTEXT parser,
+        # and tokens below the min token size are never indexed; those searches need LIKE.
+        min_token = self._error_fulltext_min_token(cur)
+        if not min_token:
+            return False
+        return all(
+            _FT_WORD.fullmatch(token) and len(token) >= min_token for token in _FT_WHITESPACE.split(keyword_raw)
         )
 
+    def _error_fulltext_min_token(self, cur) -> int:
+        # Looked up once; adding the index later (migration 20260220) needs a restart to be picked up.
+        if self._error_ft_min_token is None:
+            cur.execute(
+                """
+                SELECT 1
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE()
+                  AND TABLE_NAME = 'audit_error_events'
+                  AND INDEX_TYPE = 'FULLTEXT'
+                LIMIT 1
+                """
+            )
+            if cur.fetchone() is None:
+                self._error_ft_min_token = 0
+            else:
+                cur.execute("SELECT @@innodb_ft_min_token_size AS min_token")
+                self._error_ft_min_token = max(1, int(cur.fetchone()["min_token"]))
+        return self._error_ft_min_token
+
     def error_summary_stats(self, window_seconds: int) -> Dict[str, Any]:
+        cache_key = ("error_summary_stats", window_seconds)
+        cached = self._dashboard_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # Whole minutes from the bucket holding the window start, so the window may include up to
+        # one extra minute; the dashboard does not need sub-minute edges.
+        since = (datetime.utcnow() - timedelta(seconds=window_seconds)).replace(second=0, microsecond=0)
         with self._conn() as conn, conn.cursor() as cur:
+            if not self._error_minute_stats:
+                self._error_minute_stats = _table_exists(cur, "audit_error_minute_stats")
+            if self._error_minute_stats:
+                source, time_column, hits = "audit_error_minute_stats", "minute_ts", "hits"
+            else:
+                # Not migrated yet: count the events themselves, as before the counters existed.
+                source, time_column, hits = "audit_error_events", "event_time", "1"
             cur.execute(
-                """
+                f"""
                 SELECT
-                    COUNT(*) AS total,
-                    SUM(CASE WHEN level = 'error' THEN 1 ELSE 0 END) AS error_count,
-                    SUM(CASE WHEN level = 'warning' THEN 1 ELSE 0 END) AS warning_count,
-                    SUM(CASE WHEN level = 'info' THEN 1 ELSE 0 END) AS info_count,
-                    SUM(CASE WHEN is_noise = 1 THEN 1 ELSE 0 END) AS noise_count
-                FROM audit_error_events
-                WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)
+                    SUM({hits}) AS total,
+                    SUM(CASE WHEN level = 'error' THEN {hits} ELSE 0 END) AS error_count,
+                    SUM(CASE WHEN level = 'warning' THEN {hits} ELSE 0 END) AS warning_count,
+                    SUM(CASE WHEN level = 'info' THEN {hits} ELSE 0 END) AS info_count,
+                    SUM(CASE WHEN is_noise = 1 THEN {hits} ELSE 0 END) AS noise_count
+                FROM {source}
+                WHERE {time_column} >= %s
                 """,
-                (window_seconds,),
+                (since,),
             )
             row = cur.fetchone()
 
             cur.execute(
-                """
-                SELECT category, COUNT(*) AS hits
-                FROM audit_error_events
-                WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)
+                f"""
+                SELECT category, SUM({hits}) AS hits
+                FROM {source}
+                WHERE {time_column} >= %s
                 GROUP BY category
                 ORDER BY hits DESC
                 LIMIT 10
                 """,
-                (window_seconds,),
+                (since,),
             )
-            top_categories = list(cur.fetchall())
+            # SUM() comes back as Decimal; keep the ints COUNT(*) used to return.
+            top_categories = [{"category": r["category"], "hits": int(r["hits"])} for r in cur.fetchall()]
 
         total = int(row["total"] or 0)
-        return {
+        stats = {
             "total": total,
             "error_count": int(row["error_count"] or 0),
             "warning_count": int(row["warning_count"] or 0),
@@ -893,75 +1193,93 @@ class AuditQueryService:
             "noise_count": int(row["noise_count"] or 0),
             "top_categories": top_categories,
         }
+        self._dashboard_cache.set(cache_key, stats)
+        return stats
 
     def error_summary_payload(self, dt_from: datetime, dt_to: datetime, max_items: int) -> Dict[str, Any]:
-        with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                """
-                SELECT
-                    level,
-                    category,
-                    COUNT(*) AS hits
-                FROM audit_error_events
-                WHERE event_time > %s AND event_time <= %s
-                GROUP BY level, category
-                ORDER BY hits DESC
-                LIMIT %s
-                """,
-                (dt_from, dt_to, max_items),
-            )
-            level_category = list(cur.fetchall())
-
-            cur.execute(
-                """
-                SELECT
-                    category,
-                    signature_hash,
-                    COUNT(*) AS hits,
-                    MAX(event_time) AS latest_time,
-                    MIN(level) AS min_level,
-                    MAX(level) AS max_level,
-                    ANY_VALUE(component) AS component,
-                    ANY_VALUE(message) AS sample_message
-                FROM audit_error_events
-                WHERE event_time > %s AND event_time <= %s
-                GROUP BY category, signature_hash
-                ORDER BY hits DESC
-                LIMIT %s
-                """,
-                (dt_from, dt_to, max_items),
-            )
-            signatures = list(cur.fetchall())
-
-            cur.execute(
-                """
-                SELECT
-                    event_time, level, category, component, message, src, dest_raw
-                FROM audit_error_events
-                WHERE event_time > %s AND event_time <= %s
-                ORDER BY event_time DESC, id DESC
-                LIMIT %s
-                """,
-                (dt_from, dt_to, max_items),
-            )
-            recent_examples = list(cur.fetchall())
+        with self._conn() as conn:
+            with conn.cursor(pymysql.cursors.Cursor) as cur:
+                # Level/category counts and the total in one pass. level and category are NOT NULL,
+                # so NULL only marks WITH ROLLUP rows: per-level subtotals and the all-NULL total.
+                cur.execute(
+                    """
+                    SELECT level, category, COUNT(*) AS hits
+                    FROM audit_error_events
+                    WHERE event_time > %s AND event_time <= %s
+                    GROUP BY level, category WITH ROLLUP
+                    """,
+                    (dt_from, dt_to),
+                )
+                total = 0
+                level_category: List[Dict[str, Any]] = []
+                for level, category, hits in cur.fetchall():
+                    if level is None:
+                        total = int(hits)
+                    elif category is not None:
+                        level_category.append({"level": level, "category": category, "hits": int(hits)})
+
+            with conn.cursor() as cur:
+                # The grouping carries no TEXT column; only the top signatures look up a sample
+                # message, each through idx_err_sig_time.
+                cur.execute(
+                    """
+                    SELECT
+                        s.category,
+                        s.signature_hash,
+                        s.hits,
+                        s.latest_time,
+                        s.min_level,
+                        s.max_level,
+                        s.component,
+                        (
+                            SELECT e.message
+                            FROM audit_error_events e
+                            WHERE e.signature_hash = s.signature_hash
+                              AND e.category = s.category
+                              AND e.event_time > %s AND e.event_time <= %s
+                            LIMIT 1
+                        ) AS sample_message
+                    FROM (
+                        SELECT
+                            category,
+                            signature_hash,
+                            COUNT(*) AS hits,
+                            MAX(event_time) AS latest_time,
+                            MIN(level) AS min_level,
+                            MAX(level) AS max_level,
+                            ANY_VALUE(component) AS component
+                        FROM audit_error_events
+                        WHERE event_time > %s AND event_time <= %s
+                        GROUP BY category, signature_hash
+                        ORDER BY hits DESC
+                        LIMIT %s
+                    ) AS s
+                    ORDER BY s.hits DESC
+                    """,
+                    (dt_from, dt_to, dt_from, dt_to, max_items),
+                )
+                top_signatures = list(cur.fetchall())
 
-            cur.execute(
-                """
-                SELECT COUNT(*) AS total
-                FROM audit_error_events
-                WHERE event_time > %s AND event_time <= %s
-                """,
-                (dt_from, dt_to),
-            )
-            total = int(cur.fetchone()["total"] or 0)
+                cur.execute(
+                    """
+                    SELECT
+                        event_time, level, category, component, message, src, dest_raw
+                    FROM audit_error_events
+                    WHERE event_time > %s AND event_time <= %s
+                    ORDER BY event_time DESC, id DESC
+                    LIMIT %s
+                    """,
+                    (dt_from, dt_to, max_items),
+                )
+                recent_examples = list(cur.fetchall())
 
+        level_category.sort(key=itemgetter("hits"), reverse=True)
         return {
             "from": dt_from,
             "to": dt_to,
             "total": total,
-            "level_category": level_category,
-            "top_signatures": signatures,
+            "level_category": level_category[:max_items],
+            "top_signatures": top_signatures,
             "recent_examples": recent_examples,
         }
 
@@ -989,30 +1307,53 @@ class AuditQueryService:
         if not ips:
             return {}
 
-        placeholders = ", ".join(["%s"] * len(ips))
+        unique_ips = list(dict.fromkeys(ips))
+        out: Dict[str, Dict[str, Any]] = {}
         with self._conn() as conn, conn.cursor() as cur:
-            cur.execute(
-                f"""
-                SELECT ip, country, region, city, isp, addr, status, source, updated_at
-                FROM audit_ip_geo_cache
-                WHERE ip IN ({placeholders})
-                  AND updated_at >= (NOW(6) - INTERVAL %s HOUR)
-                """,
-                tuple(ips + [ttl_hours]),
-            )
-            rows = list(cur.fetchall())
-        return {str(row["ip"]): row for row in rows}
+            for start in range(0, len(unique_ips), _GEO_LOOKUP_CHUNK):
+                chunk = unique_ips[start : start + _GEO_LOOKUP_CHUNK]
+                placeholders = ", ".join(["%s"] * len(chunk))
+                cur.execute(
+                    f"""
+                    SELECT ip, country, region, city, isp, addr, status, source, updated_at
+                    FROM audit_ip_geo_cache
+                    WHERE ip IN ({placeholders})
+                      AND updated_at >= (NOW(6) - INTERVAL %s HOUR)
+                    """,
+                    tuple(chunk + [ttl_hours]),
+                )
+                for row in cur.fetchall():
+                    out[row["ip"]] = row
+        return out
 
     def geo_cache_upsert(self, rows: List[Dict[str, Any]]) -> None:
         if not rows:
             return
 
+        values = [
+            (
+                row.get("ip", ""),
+                row.get("country", ""),
+                row.get("region", ""),
+                row.get("city", ""),
+                row.get("isp", ""),
+                row.get("addr", ""),
+                row.get("status", "ok"),
+                row.get("source", "pconline"),
+                orjson.dumps(row["raw"]).decode() if row.get("raw") else None,
+            )
+            for row in rows
+        ]
         with self._conn() as conn, conn.cursor() as cur:
-            cur.executemany(
+            _insert_multirow(
+                cur,
                 """
                 INSERT INTO audit_ip_geo_cache(
                     ip, country, region, city, isp, addr, status, source, raw_json, updated_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(6))
+                ) VALUES """,
+                "(%s, %s, %s, %s, %s, %s, %s, %s, %s, NOW(6))",
+                values,
+                """
                 ON DUPLICATE KEY UPDATE
                     country=VALUES(country),
                     region=VALUES(region),
@@ -1024,55 +1365,224 @@ class AuditQueryService:
                     raw_json=VALUES(raw_json),
                     updated_at=NOW(6)
                 """,
-                [
-                    (
-                        row.get("ip", ""),
-                        row.get("country", ""),
-                        row.get("region", ""),
-                        row.get("city", ""),
-                        row.get("isp", ""),
-                        row.get("addr", ""),
-                        row.get("status", "ok"),
-                        row.get("source", "pconline"),
-                        json.dumps(row.get("raw", {}), ensure_ascii=False),
-                    )
-                    for row in rows
-                ],
             )
             conn.commit()
 
     def top_domains(self, seconds: int, limit: int) -> List[Dict[str, Any]]:
+        cache_key = ("top_domains", seconds, limit)
+        cached = self._dashboard_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
                 SELECT dest_host AS domain, COUNT(*) AS hits
                 FROM audit_access_events
-                WHERE event_time >= (NOW(6) - INTERVAL %s SECOND)
+                WHERE event_time >= %s
                   AND dest_host <> ''
                   AND is_domain = 1
                 GROUP BY dest_host
                 ORDER BY hits DESC
                 LIMIT %s
                 """,
-                (seconds, limit),
+                # A client-computed UTC bound is a constant the optimizer can seek the time index with.
+                (datetime.utcnow() - timedelta(seconds=seconds), limit),
             )
-            return list(cur.fetchall())
+            items = list(cur.fetchall())
+        self._dashboard_cache.set(cache_key, items)
+        return items
 
     def active_users(self, seconds: int, limit: int) -> List[Dict[str, Any]]:
+        cache_key = ("active_users", seconds, limit)
+        cached = self._dashboard_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         with self._conn() as conn, conn.cursor() as cur:
             cur.execute(
                 """
                 SELECT user_email, UNIX_TIMESTAMP(MAX(event_time)) AS last_seen_unix
                 FROM audit_access_events
                 WHERE user_email <> ''
-                  AND event_time >= (NOW(6) - INTERVAL %s SECOND)
+                  AND event_time >= %s
                 GROUP BY user_email
                 ORDER BY last_seen_unix DESC
                 LIMIT %s
                 """,
-                (seconds, limit),
+                (datetime.utcnow() - timedelta(seconds=seconds), limit),
             )
-            return list(cur.fetchall())
+            items = list(cur.fetchall())
+        self._dashboard_cache.set(cache_key, items)
+        return items
+
+
+def _table_exists(cur, table: str) -> bool:
+    cur.execute(
+        "SELECT 1 FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s LIMIT 1",
+        (table,),
+    )
+    return cur.fetchone() is not None
+
+
+def _close_quietly(conn) -> None:
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+# Optional query_events filters, in the bit order of the mask passed to _query_events_sql.
+_QUERY_EVENTS_FILTERS = (
+    "a.user_email = %s",
+    "a.dest_host LIKE %s",
+    "a.status = %s",
+    "a.detour LIKE %s",
+    "a.is_domain = %s",
+    "a.dest_host_rev LIKE %s",
+)
+
+
+@lru_cache(maxsize=None)
+def _query_events_sql(mask: int, seek: bool = False) -> Tuple[str, str]:
+    filters = ["r.event_type = %s", "r.event_time >= %s", "r.event_time <= %s"]
+    filters.extend(clause for bit, clause in enumerate(_QUERY_EVENTS_FILTERS) if mask & (1 << bit))
+    where_sql = " AND ".join(filters)
+    page_where_sql = where_sql
+    if seek:
+        page_where_sql += " AND (r.event_time < %s OR (r.event_time = %s AND r.id < %s))"
+    joins_sql = """
+            FROM audit_raw_events r
+            LEFT JOIN audit_access_events a ON a.raw_event_id = r.id
+            LEFT JOIN audit_dns_events d ON d.raw_event_id = r.id
+        """
+    page_sql = f"""
+                SELECT
+                    r.id,
+                    r.event_time,
+                    r.event_type,
+                    r.raw_line,
+                    r.node_id,
+                    a.user_email,
+                    a.src,
+                    a.dest_raw,
+                    a.dest_host,
+                    a.dest_port,
+                    a.status,
+                    a.detour,
+                    a.reason,
+                    a.is_domain,
+                    a.confidence,
+                    d.dns_server,
+                    d.domain,
+                    d.ips_json,
+                    d.dns_status,
+                    d.elapsed_ms,
+                    d.error_text
+                {joins_sql}
+                WHERE {page_where_sql}
+                ORDER BY r.event_time DESC, r.id DESC
+                LIMIT %s OFFSET %s
+                """
+    count_sql = f"SELECT COUNT(*) AS total {joins_sql} WHERE {where_sql}"
+    return page_sql, count_sql
+
+
+# Optional error search filters, in the bit order of the mask built by _error_filters.
+_ERROR_EVENTS_FILTERS = (
+    "level = %s",
+    "category = %s",
+    "is_noise = 0",
+)
+_ERROR_KEYWORD_FILTERS = {
+    "": "",
+    "fulltext": "MATCH(component, message, src, dest_raw) AGAINST (%s IN BOOLEAN MODE)",
+    "like": "(component LIKE %s OR message LIKE %s OR src LIKE %s OR dest_raw LIKE %s)",
+}
+
+
+@lru_cache(maxsize=None)
+def _error_events_where(mask: int, keyword_kind: str) -> str:
+    filters = ["event_time >= %s", "event_time <= %s"]
+    filters.extend(clause for bit, clause in enumerate(_ERROR_EVENTS_FILTERS) if mask & (1 << bit))
+    if keyword_kind:
+        filters.append(_ERROR_KEYWORD_FILTERS[keyword_kind])
+    return " AND ".join(filters)
+
+
+@lru_cache(maxsize=None)
+def _error_events_sql(mask: int, keyword_kind: str, seek: bool = False) -> Tuple[str, str]:
+    where_sql = _error_events_where(mask, keyword_kind)
+    page_where_sql = where_sql
+    if seek:
+        page_where_sql += " AND (event_time < %s OR (event_time = %s AND id < %s))"
+    page_sql = f"""
+                SELECT
+                    id,
+                    event_time,
+                    level,
+                    session_id,
+                    component,
+                    message,
+                    src,
+                    dest_raw,
+                    dest_host,
+                    dest_port,
+                    category,
+                    signature_hash,
+                    is_noise,
+                    node_id
+                FROM audit_error_events
+                WHERE {page_where_sql}
+                ORDER BY event_time DESC, id DESC
+                LIMIT %s OFFSET %s
+                """
+    count_sql = f"SELECT COUNT(*) AS total FROM audit_error_events WHERE {where_sql}"
+    return page_sql, count_sql
+
+
+def _seek_clause(
+    time_column: str, id_column: str, after: Optional[Tuple[datetime, int]], keyword: str
+) -> Tuple[str, Tuple[Any, ...]]:
+    # Keyset pagination for (time DESC, id DESC): rows strictly after the last row already shown.
+    # Spelled out instead of a row comparison so MySQL can use a range scan on the time index.
+    if after is None:
+        return "", ()
+    return (
+        f"{keyword} ({time_column} < %s OR ({time_column} = %s AND {id_column} < %s))",
+        (after[0], after[0], after[1]),
+    )
+
+
+def _canonical_json(raw: Any) -> Optional[str]:
+    # MySQL JSON columns come back re-serialized, so compare in one canonical form.
+    if raw is None:
+        return None
+    try:
+        return orjson.dumps(orjson.loads(raw), option=orjson.OPT_SORT_KEYS).decode()
+    except (TypeError, ValueError):
+        return None
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _insert_multirow(
+    cur, head: str, row_sql: str, rows: List[Tuple[Any, ...]], tail: str = "", chunk_size: int = _MULTIROW_CHUNK
+) -> List[int]:
+    # PyMySQL only packs executemany() into one statement when VALUES holds bare placeholders;
+    # rows with server-side expressions such as NOW(6) are packed here instead.
+    # Returns the first auto-increment id of each chunk (cursor.lastrowid).
+    first_ids: List[int] = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start : start + chunk_size]
+        cur.execute(
+            head + ", ".join([row_sql] * len(chunk)) + tail,
+            [value for row in chunk for value in row],
+        )
+        first_ids.append(int(cur.lastrowid or 0))
+    return first_ids
 
 
 def apply_schema(settings: Settings, schema_path: str) -> None:
@@ -1080,24 +1590,36 @@ def apply_schema(settings: Settings, schema_path: str) -> None:
         raise FileNotFoundError(schema_path)
 
     factory = MySQLFactory(settings)
-    conn = factory.connect()
+    conn = factory.connect(multi_statements=True)
     try:
-        with open(schema_path, "r", encoding="utf-8") as f:
+        with open(schema_path, "r", encoding="utf-8-sig") as f:
             sql = f.read()
 
+        # The server splits the file itself (so ';' inside strings or comments is safe) and
+        # runs it in one round trip; a failing statement raises while draining its result.
         with conn.cursor() as cur:
-            for statement in [x.strip() for x in sql.split(";") if x.strip()]:
-                cur.execute(statement)
+            cur.execute(sql)
+            while cur.nextset():
+                pass
         conn.commit()
     finally:
         conn.close()
 
 
+_FT_WHITESPACE = re.compile(r"\s+")
+_FT_UNSAFE_CHARS = re.compile(r"[^\w\.\-:]+")
+_FT_WORD = re.compile(r"\w+")
+# Longer keywords only make the tokenizer slower; eight prefix terms fit well within this.
+_FT_MAX_INPUT_CHARS = 256
+
+
 def _to_fulltext_query(raw: str) -> str:
-    tokens = [t.strip() for t in re.split(r"\s+", raw) if t.strip()]
+    raw = raw[:_FT_MAX_INPUT_CHARS].strip()
+    if not raw:
+        return ""
     prepared: List[str] = []
-    for token in tokens:
-        safe = re.sub(r"[^\w\.\-:]+", "", token)
+    for token in _FT_WHITESPACE.split(raw):
+        safe = _FT_UNSAFE_CHARS.sub("", token)
         if len(safe) < 2:
             continue
         prepared.append(f"+{safe}*")
@@ -1105,5 +1627,5 @@ def _to_fulltext_query(raw: str) -> str:
             break
     if prepared:
         return " ".join(prepared)
-    safe = re.sub(r"[^\w\.\-:]+", "", raw.strip())
+    safe = _FT_UNSAFE_CHARS.sub("", raw)
     return f"+{safe}*" if len(safe) >= 2 else ""
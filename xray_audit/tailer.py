@@ -1,16 +1,31 @@
 from __future__ import annotations
 
 import os
-from typing import List, Optional, Tuple
+import re
+import time
+from typing import Any, List, Optional, Tuple
+
+try:
+    import inotify_simple
+except ImportError:
+    # Linux-only and optional; without it the collector falls back to polling.
+    inotify_simple = None
+
+_READ_CHUNK_BYTES = 1 << 20
+_LINE = re.compile(r"[^\n]*\n")
 
 
 class LogTailer:
     def __init__(self, path: str, encoding: str = "utf-8") -> None:
         self.path = path
         self.encoding = encoding
-        self._fh = None
+        self._fd: Optional[int] = None
+        # Bytes read from the file but not yet returned; always starts at self._offset.
+        self._buf = bytearray()
         self._inode: Optional[int] = None
         self._offset: int = 0
+        self._inotify: Any = None
+        self._inotify_failed = False
 
     def set_state(self, inode: Optional[int], offset: int) -> None:
         self._inode = inode
@@ -20,56 +35,120 @@ class LogTailer:
         return self._inode, self._offset
 
     def close(self) -> None:
-        if self._fh is not None:
-            self._fh.close()
-            self._fh = None
+        self._close_file()
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+
+    def _close_file(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        self._buf.clear()
+
+    def wait_for_data(self, timeout: float) -> None:
+        # Sleeps up to timeout, but wakes as soon as anything in the log's directory changes.
+        watcher = self._watcher()
+        if watcher is None:
+            time.sleep(timeout)
+            return
+        # The directory is watched so creates/renames from rotation wake us too.
+        watcher.read(timeout=max(1, int(timeout * 1000)))
+
+    def _watcher(self) -> Any:
+        if self._inotify is None and not self._inotify_failed and inotify_simple is not None:
+            flags = inotify_simple.flags
+            watcher = inotify_simple.INotify()
+            try:
+                watcher.add_watch(
+                    os.path.dirname(os.path.abspath(self.path)),
+                    flags.MODIFY | flags.CREATE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE,
+                )
+            except OSError:
+                watcher.close()
+                self._inotify_failed = True
+                return None
+            self._inotify = watcher
+        return self._inotify
 
     def _open(self) -> bool:
-        if not os.path.exists(self.path):
+        try:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
             return False
 
-        stat = os.stat(self.path)
-        self._fh = open(self.path, "r", encoding=self.encoding, errors="replace")
+        stat = os.fstat(self._fd)
         self._inode = stat.st_ino
 
         if stat.st_size < self._offset:
             self._offset = 0
-        self._fh.seek(self._offset)
+        os.lseek(self._fd, self._offset, os.SEEK_SET)
+        self._buf.clear()
         return True
 
     def _ensure_open(self) -> bool:
-        if self._fh is not None:
+        if self._fd is not None:
             return True
         return self._open()
 
-    def _check_rotation_or_truncate(self) -> None:
-        if not os.path.exists(self.path):
-            return
+    def _check_rotation_or_truncate(self) -> List[str]:
+        # Only called once the open fd has been read to EOF.
+        try:
+            path_ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            # Renamed away and not recreated yet; the writer may still append to the old file.
+            return []
 
-        stat = os.stat(self.path)
-        if self._inode is not None and stat.st_ino != self._inode:
-            self.close()
+        fd_stat = os.fstat(self._fd)
+        if path_ino != fd_stat.st_ino:
+            # Rotated: take whatever the writer appended before switching, including an
+            # unterminated last line that will now never be finished, then follow the new file.
+            while True:
+                chunk = os.read(self._fd, _READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                self._buf += chunk
+            text = self._buf.decode(self.encoding, errors="replace")
+            out = _LINE.findall(text)
+            tail = text[text.rfind("\n") + 1 :]
+            if tail:
+                out.append(tail)
+            self._close_file()
             self._offset = 0
             self._open()
-            return
+            return out
 
-        if stat.st_size < self._offset and self._fh is not None:
-            self._fh.seek(0)
+        if fd_stat.st_size < self._offset + len(self._buf):
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            self._buf.clear()
             self._offset = 0
+        return []
 
     def read_new_lines(self, max_lines: int = 4096) -> List[str]:
         if not self._ensure_open():
             return []
 
-        out: List[str] = []
-        while len(out) < max_lines:
-            line = self._fh.readline()
-            if not line:
-                break
-            self._offset = self._fh.tell()
-            out.append(line)
-
-        if not out:
-            self._check_rotation_or_truncate()
-
+        buf = self._buf
+        newlines = buf.count(b"\n")
+        at_eof = False
+        if newlines < max_lines:
+            chunk = os.read(self._fd, _READ_CHUNK_BYTES)
+            at_eof = len(chunk) < _READ_CHUNK_BYTES
+            buf += chunk
+            newlines = buf.count(b"\n")
+
+        # Only complete lines are returned; a partial last line waits for the writer to finish it.
+        if newlines <= max_lines:
+            cut = buf.rfind(b"\n") + 1
+        else:
+            cut = 0
+            for _ in range(max_lines):
+                cut = buf.index(b"\n", cut) + 1
+
+        if not cut:
+            return self._check_rotation_or_truncate() if at_eof else []
+
+        out = _LINE.findall(buf[:cut].decode(self.encoding, errors="replace"))
+        del buf[:cut]
+        self._offset += cut
         return out